@@ -3,14 +3,192 @@
 from __future__ import annotations
 
 import csv
+from collections import defaultdict
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List
 
-import pandas as pd
+if TYPE_CHECKING:
+    import pandas as pd
 
 LOG_FILE = Path(__file__).parent.parent / "metrics_log.csv"
 OUTPUT_FILE = Path(__file__).parent.parent / "analysis_summary.csv"
 
+# Logs with fewer rows than this are aggregated in pure Python, which is
+# faster than paying the pandas/DuckDB import and setup cost.
+SMALL_LOG_ROWS = 2000
+
+SUMMARY_COLUMNS = [
+    "task_type",
+    "model",
+    "count",
+    "success_rate",
+    "avg_input_tokens",
+    "avg_output_tokens",
+    "avg_total_tokens",
+    "total_cost_usd",
+    "avg_cost_usd",
+    "avg_latency_seconds",
+    "total_latency_seconds",
+]
+
+# Only the columns the summary needs, with dtypes fixed up front so the
+# parser skips inference and no per-column casts are needed afterwards.
+LOG_DTYPES = {
+    "task_type": "category",
+    "model": "category",
+    "success": "bool",
+    "input_tokens": "int32",
+    "output_tokens": "int32",
+    "total_tokens": "int32",
+    "cost_usd": "float64",
+    "latency_seconds": "float64",
+}
+
+# Same column set typed for DuckDB's CSV reader.
+LOG_SQL_TYPES = {
+    "task_type": "VARCHAR",
+    "model": "VARCHAR",
+    "success": "BOOLEAN",
+    "input_tokens": "INTEGER",
+    "output_tokens": "INTEGER",
+    "total_tokens": "INTEGER",
+    "cost_usd": "DOUBLE",
+    "latency_seconds": "DOUBLE",
+}
+
+
+def _is_small_log() -> bool:
+    """Whether the log has fewer than SMALL_LOG_ROWS data rows (stops reading early)."""
+    with open(LOG_FILE, newline="") as f:
+        return sum(1 for _ in islice(f, SMALL_LOG_ROWS + 1)) <= SMALL_LOG_ROWS
+
+
+def _summarize_small() -> List[Dict[str, Any]]:
+    """Aggregate the log in a single csv.reader pass without pandas."""
+    # Per (task_type, model): count, successes, input, output, total tokens, cost, latency
+    sums: Dict[tuple, List[float]] = defaultdict(lambda: [0, 0, 0, 0, 0, 0.0, 0.0])
+    with open(LOG_FILE, newline="") as f:
+        for row in csv.DictReader(f):
+            acc = sums[(row["task_type"], row["model"])]
+            acc[0] += 1
+            acc[1] += row["success"] == "True"
+            acc[2] += int(row["input_tokens"])
+            acc[3] += int(row["output_tokens"])
+            acc[4] += int(row["total_tokens"])
+            acc[5] += float(row["cost_usd"])
+            acc[6] += float(row["latency_seconds"])
+
+    rows = []
+    for (task_type, model), (n, ok, inp, out, tot, cost, latency) in sorted(sums.items()):
+        rows.append({
+            "task_type": task_type,
+            "model": model,
+            "count": n,
+            "success_rate": ok / n * 100,
+            "avg_input_tokens": inp / n,
+            "avg_output_tokens": out / n,
+            "avg_total_tokens": tot / n,
+            "total_cost_usd": cost,
+            "avg_cost_usd": cost / n,
+            "avg_latency_seconds": latency / n,
+            "total_latency_seconds": latency,
+        })
+    return rows
+
+
+def _read_log() -> "pd.DataFrame":
+    """Load the metrics log, preferring the multi-threaded Arrow CSV reader."""
+    import pandas as pd
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return pd.read_csv(LOG_FILE, usecols=list(LOG_DTYPES), dtype=LOG_DTYPES, engine="c")
+    # Group keys stay categorical so the groupby hashes dense integer codes
+    return pd.read_csv(
+        LOG_FILE,
+        usecols=list(LOG_DTYPES),
+        dtype={"task_type": "category", "model": "category"},
+        engine="pyarrow",
+        dtype_backend="pyarrow",
+    )
+
+
+_DUCKDB_SUMMARY_SQL = """
+SELECT
+    task_type,
+    model,
+    COUNT(*) AS count,
+    AVG(success::INTEGER) * 100 AS success_rate,
+    AVG(input_tokens) AS avg_input_tokens,
+    AVG(output_tokens) AS avg_output_tokens,
+    AVG(total_tokens) AS avg_total_tokens,
+    SUM(cost_usd) AS total_cost_usd,
+    AVG(cost_usd) AS avg_cost_usd,
+    AVG(latency_seconds) AS avg_latency_seconds,
+    SUM(latency_seconds) AS total_latency_seconds
+FROM log
+GROUP BY task_type, model
+ORDER BY task_type, model
+"""
+
+
+def _summarize_duckdb(duckdb) -> List[Dict[str, Any]]:
+    """Aggregate the log in a single streaming DuckDB scan."""
+    con = duckdb.connect()
+    try:
+        con.read_csv(str(LOG_FILE), header=True, dtype=LOG_SQL_TYPES).create_view("log")
+        return [dict(zip(SUMMARY_COLUMNS, row)) for row in con.execute(_DUCKDB_SUMMARY_SQL).fetchall()]
+    finally:
+        con.close()
+
+
+def _summarize_pandas() -> List[Dict[str, Any]]:
+    """Aggregate the log in memory with a single pandas groupby."""
+    df = _read_log()
+
+    summary_df = df.groupby(["task_type", "model"], sort=True, observed=True).agg(
+        count=("success", "size"),
+        success_rate=("success", "mean"),
+        avg_input_tokens=("input_tokens", "mean"),
+        avg_output_tokens=("output_tokens", "mean"),
+        avg_total_tokens=("total_tokens", "mean"),
+        total_cost_usd=("cost_usd", "sum"),
+        avg_cost_usd=("cost_usd", "mean"),
+        avg_latency_seconds=("latency_seconds", "mean"),
+        total_latency_seconds=("latency_seconds", "sum"),
+    ).reset_index()
+    summary_df["success_rate"] *= 100
+    return summary_df[SUMMARY_COLUMNS].to_dict("records")
+
+
+def _overall_totals(summary: List[Dict[str, Any]]) -> Dict[str, float]:
+    """Derive overall totals from the per-group aggregates (count-weighted)."""
+    runs = int(sum(row["count"] for row in summary))
+    tokens = sum(row["count"] * row["avg_total_tokens"] for row in summary)
+    successes = sum(row["count"] * row["success_rate"] for row in summary)
+    return {
+        "runs": runs,
+        "cost": float(sum(row["total_cost_usd"] for row in summary)),
+        "tokens": int(round(tokens)),
+        "success_rate": float(successes / runs) if runs else 0.0,
+    }
+
+
+def _render_summary(summary: List[Dict[str, Any]]) -> str:
+    """Render the summary table for the console, via tabulate when available."""
+    try:
+        from tabulate import tabulate
+    except ImportError:
+        cells = [SUMMARY_COLUMNS] + [
+            [f"{row[col]:g}" if isinstance(row[col], float) else str(row[col]) for col in SUMMARY_COLUMNS]
+            for row in summary
+        ]
+        widths = [max(len(line[i]) for line in cells) for i in range(len(SUMMARY_COLUMNS))]
+        return "\n".join("  ".join(c.rjust(w) for c, w in zip(line, widths)) for line in cells)
+    return tabulate(summary, headers="keys")
+
 
 def analyze_metrics() -> None:
     """Analyze metrics from log file and generate summary."""
@@ -19,53 +197,37 @@ def analyze_metrics() -> None:
         print("Run some backtests first to generate metrics.")
         return
 
-    df = pd.read_csv(LOG_FILE)
+    # Basic statistics by task type and model: pure Python for small logs,
+    # otherwise DuckDB when available, falling back to pandas
+    if _is_small_log():
+        summary = _summarize_small()
+    else:
+        try:
+            import duckdb
+        except ImportError:
+            summary = _summarize_pandas()
+        else:
+            summary = _summarize_duckdb(duckdb)
+    totals = _overall_totals(summary)
 
-    # Basic statistics by task type and model
-    summary = []
-    
-    for task_type in df["task_type"].unique():
-        for model in df["model"].unique():
-            subset = df[(df["task_type"] == task_type) & (df["model"] == model)]
-            
-            if len(subset) == 0:
-                continue
-            
-            summary.append({
-                "task_type": task_type,
-                "model": model,
-                "count": len(subset),
-                "success_rate": subset["success"].mean() * 100,
-                "avg_input_tokens": subset["input_tokens"].mean(),
-                "avg_output_tokens": subset["output_tokens"].mean(),
-                "avg_total_tokens": subset["total_tokens"].mean(),
-                "total_cost_usd": subset["cost_usd"].astype(float).sum(),
-                "avg_cost_usd": subset["cost_usd"].astype(float).mean(),
-                "avg_latency_seconds": subset["latency_seconds"].astype(float).mean(),
-                "total_latency_seconds": subset["latency_seconds"].astype(float).sum(),
-            })
-
-    summary_df = pd.DataFrame(summary)
-    
-    # Sort by task_type and model
-    summary_df = summary_df.sort_values(["task_type", "model"])
-    
     # Save summary
-    summary_df.to_csv(OUTPUT_FILE, index=False)
+    with open(OUTPUT_FILE, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+        writer.writeheader()
+        writer.writerows(summary)
     print(f"Analysis complete! Summary saved to {OUTPUT_FILE}")
     print("\nSummary Statistics:")
     print("=" * 80)
-    print(summary_df.to_string(index=False))
+    print(_render_summary(summary))
     
     # Overall totals
     print("\n" + "=" * 80)
     print("Overall Totals:")
-    print(f"Total runs: {len(df)}")
-    print(f"Total cost: ${df['cost_usd'].astype(float).sum():.4f}")
-    print(f"Total tokens: {df['total_tokens'].sum():,}")
-    print(f"Overall success rate: {df['success'].mean() * 100:.1f}%")
+    print(f"Total runs: {totals['runs']}")
+    print(f"Total cost: ${totals['cost']:.4f}")
+    print(f"Total tokens: {totals['tokens']:,}")
+    print(f"Overall success rate: {totals['success_rate']:.1f}%")
 
 
 if __name__ == "__main__":
     analyze_metrics()
-
@@ -1,15 +1,20 @@
 from __future__ import annotations
 
-import hashlib
+import io
 import logging
 import os
+import re
 import uuid
-from typing import Dict
+import zlib
+from dataclasses import astuple
+from typing import Dict, List
 
+import numpy as np
+import pandas as pd
 import streamlit as st
 
 from core.strategy_spec import StrategySpec, CrossoverRule, VolFilterRule
-from core.backtester import trades_to_dataframe
+from core.backtester import Trade, trades_to_dataframe
 from core.plotting import plot_equity_curve
 from pipeline.graph import run_pipeline, resume_pipeline, get_pipeline_state
 
@@ -28,43 +33,96 @@ Only enter new positions when 20-day realized volatility is below its 1-year med
 Show CAGR, max drawdown, and Sharpe ratio."""
 
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def _text_fingerprint(text: str) -> int:
+    """Checksum of the strategy text, computed once per unique string."""
+    return zlib.crc32(text.encode())
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _cached_equity_png(df_hash: int, _df: pd.DataFrame) -> bytes:
+    """Equity-curve chart as PNG bytes, rebuilt only when the results fingerprint changes.
+
+    Rendered bytes are cached rather than the Figure, so sessions never share a
+    mutable Matplotlib object.
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plot_equity_curve(_df)
+    buf = io.BytesIO()
+    fig.savefig(buf, format="png", bbox_inches="tight")
+    plt.close(fig)
+    return buf.getvalue()
+
+
+@st.cache_data(
+    max_entries=4,
+    show_spinner=False,
+    hash_funcs={Trade: astuple},  # every field the table shows, so runs never share a table
+)
+def _cached_trades_df(trades: List[Trade]) -> pd.DataFrame:
+    """Trade table for display, rebuilt only when the trades change."""
+    return trades_to_dataframe(trades)
+
+
+@st.cache_data(ttl=1.0, show_spinner=False)
+def _cached_state(session_id: str):
+    """Checkpoint state for a session, deduplicated across fetches within a rerun."""
+    return get_pipeline_state(session_id)
+
+
+# Error patterns in priority order. Each alternative is a lookahead anchored at
+# the start of the message, so the first matching *category* wins regardless of
+# where its keyword appears in the text.
+_ERROR_PATTERN = re.compile(
+    r"^(?:"
+    r"(?=.*(?:Invalid date format|YYYY-MM-DD))(?P<date>)"
+    r"|(?=.*Invalid isoformat string)(?P<iso>)"
+    r"|(?=.*(?i:translat))(?P<translation>)"
+    r"|(?=.*(?i:data.*fetch|fetch.*data))(?P<data>)"
+    r")",
+    re.DOTALL,
+)
+
+_ERROR_TEMPLATES = {
+    "date": "**Date Error:** Your strategy description is missing dates or has invalid date format. Please include dates in your prompt, for example: 'Backtest AAPL from 2020-01-01 to 2024-01-01'",
+    "iso": "**Date Error:** The LLM generated invalid dates. Please make sure your prompt includes explicit dates like 'from 2020-01-01 to 2024-01-01'",
+    "translation": "**Translation Error:** {error}. The LLM may have misunderstood your strategy. Try rephrasing your prompt with explicit dates and clearer instructions.",
+    "data": "**Data Error:** {error}. Could not download price data. Check your ticker symbol and date range.",
+}
+
+
 def _format_error_message(error: str) -> str:
     """Format error messages to be more user-friendly."""
-    # Handle common error patterns
-    if "Invalid date format" in error or "YYYY-MM-DD" in error:
-        return "**Date Error:** Your strategy description is missing dates or has invalid date format. Please include dates in your prompt, for example: 'Backtest AAPL from 2020-01-01 to 2024-01-01'"
-    if "Invalid isoformat string" in error:
-        return "**Date Error:** The LLM generated invalid dates. Please make sure your prompt includes explicit dates like 'from 2020-01-01 to 2024-01-01'"
-    if "translation" in error.lower() or "translate" in error.lower():
-        return f"**Translation Error:** {error}. The LLM may have misunderstood your strategy. Try rephrasing your prompt with explicit dates and clearer instructions."
-    if "data" in error.lower() and "fetch" in error.lower():
-        return f"**Data Error:** {error}. Could not download price data. Check your ticker symbol and date range."
-    # Return original error if no pattern matches
-    return error
+    match = _ERROR_PATTERN.match(error)
+    if match is None:
+        # Return original error if no pattern matches
+        return error
+    return _ERROR_TEMPLATES[match.lastgroup].format(error=error)
 
 
+@st.cache_data(max_entries=8, show_spinner=False, hash_funcs={StrategySpec: lambda spec: spec.canonical_json})
 def get_default_assumptions(spec: StrategySpec) -> Dict[str, str]:
     """Extract and format default assumptions from the strategy spec."""
     assumptions = {}
     
-    # Moving average assumptions
+    # Collect MA and volatility windows in a single pass over the rules
     ma_windows = set()
+    vol_windows = set()
     for rule in spec.entry_rules + spec.exit_rules:
         if isinstance(rule, CrossoverRule):
             ma_windows.add(rule.fast_ma)
             ma_windows.add(rule.slow_ma)
+        elif isinstance(rule, VolFilterRule):
+            vol_windows.add(rule.window)
     
+    # Moving average assumptions
     if ma_windows:
         ma_list = ", ".join([f"{w}-day" for w in sorted(ma_windows)])
         assumptions["Moving Average Type"] = "Simple Moving Average (SMA)"
         assumptions["MA Windows"] = ma_list
     
     # Volatility assumptions
-    vol_windows = set()
-    for rule in spec.entry_rules + spec.exit_rules:
-        if isinstance(rule, VolFilterRule):
-            vol_windows.add(rule.window)
-    
     if vol_windows:
         vol_list = ", ".join([f"{w}-day" for w in sorted(vol_windows)])
         assumptions["Realized Volatility Calculation"] = (
@@ -138,9 +196,15 @@ def main():
         st.session_state.user_text_hash = None
     if "model_used" not in st.session_state:
         st.session_state.model_used = None
-
-    # Hash user text to detect changes
-    current_text_hash = hashlib.md5(user_text.encode()).hexdigest()
+    if "default_assumptions" not in st.session_state:
+        st.session_state.default_assumptions = None
+    if "spec_dict" not in st.session_state:
+        st.session_state.spec_dict = None
+    if "pipeline_complete" not in st.session_state:
+        st.session_state.pipeline_complete = False
+
+    # Cheap checksum of user text to detect changes (no cryptographic strength needed)
+    current_text_hash = _text_fingerprint(user_text)
     
     # Reset pipeline if user text or model changed
     model_changed = st.session_state.model_used != selected_model
@@ -149,6 +213,9 @@ def main():
         st.session_state.pipeline_session_id = str(uuid.uuid4())  # New session for new input
         st.session_state.user_text_hash = current_text_hash
         st.session_state.model_used = selected_model
+        st.session_state.default_assumptions = None
+        st.session_state.spec_dict = None
+        st.session_state.pipeline_complete = False
 
     run_button = st.button("Run backtest")
 
@@ -164,6 +231,10 @@ def main():
                         session_id=st.session_state.pipeline_session_id,
                         confirmed=False
                     )
+                    _cached_state.clear()
+                    st.session_state.default_assumptions = None
+                    st.session_state.spec_dict = None
+                    st.session_state.pipeline_complete = False
                     if state:
                         logger.info(f"Pipeline returned state - current_step: {state.get('current_step')}, has_spec: {state.get('spec') is not None}, has_interpretation: {state.get('interpretation') is not None}")
                         st.session_state.pipeline_state = state
@@ -171,7 +242,7 @@ def main():
                     else:
                         logger.warning("Pipeline returned None state - trying to retrieve from checkpoint")
                         # Try to get state from checkpoint as fallback
-                        state = get_pipeline_state(st.session_state.pipeline_session_id)
+                        state = _cached_state(st.session_state.pipeline_session_id)
                         if state:
                             logger.info(f"Retrieved state from checkpoint - current_step: {state.get('current_step')}")
                             st.session_state.pipeline_state = state
@@ -181,10 +252,11 @@ def main():
                             st.stop()
                     logger.info("Pipeline started, paused at checkpoint")
                 except Exception as e:
+                    _cached_state.clear()
                     logger.error(f"Pipeline execution failed: {e}")
                     # Try to get state from checkpoint to retrieve error details
                     try:
-                        state = get_pipeline_state(st.session_state.pipeline_session_id)
+                        state = _cached_state(st.session_state.pipeline_session_id)
                         if state:
                             st.session_state.pipeline_state = state
                             # Display errors from state if available
@@ -204,7 +276,7 @@ def main():
                     st.stop()
         else:
             # Try to get existing state from checkpoint
-            state = get_pipeline_state(st.session_state.pipeline_session_id)
+            state = _cached_state(st.session_state.pipeline_session_id)
             if state:
                 logger.info(f"Retrieved existing state from checkpoint - current_step: {state.get('current_step')}, has_spec: {state.get('spec') is not None}")
                 st.session_state.pipeline_state = state
@@ -236,8 +308,10 @@ def main():
         interpretation = state.get("interpretation")
         
         if spec:
-            # Get default assumptions
-            default_assumptions = get_default_assumptions(spec)
+            # Get default assumptions (computed once per spec, reused across reruns)
+            if st.session_state.default_assumptions is None:
+                st.session_state.default_assumptions = get_default_assumptions(spec)
+            default_assumptions = st.session_state.default_assumptions
             
             # Display interpretation and assumptions side-by-side
             if interpretation:
@@ -259,7 +333,9 @@ def main():
             # Show parsed spec
             st.subheader("📊 Parsed Strategy Specification")
             with st.expander("View technical specification (JSON)", expanded=False):
-                st.json(spec.to_dict())
+                if st.session_state.spec_dict is None:
+                    st.session_state.spec_dict = spec.to_dict()
+                st.json(st.session_state.spec_dict)
 
             # Show validation errors/warnings if any
             validation_result = state.get("validation_result")
@@ -291,6 +367,7 @@ def main():
                             session_id=st.session_state.pipeline_session_id,
                             confirmed=True
                         )
+                        _cached_state.clear()
                         if final_state:
                             logger.info(f"Pipeline resumed - current_step: {final_state.get('current_step')}, has_backtest_results: {final_state.get('backtest_results') is not None}")
                             st.session_state.pipeline_state = final_state
@@ -302,9 +379,7 @@ def main():
                             logger.error("resume_pipeline returned None")
                             st.stop()
                     except Exception as e:
-                        logger.error(f"Pipeline resume failed: {e}")
-                        import traceback
-                        logger.error(traceback.format_exc())
+                        logger.error(f"Pipeline resume failed: {e}", exc_info=True)
                         st.error(f"Failed to resume pipeline: {e}")
                         st.stop()
             
@@ -314,6 +389,7 @@ def main():
     # Check if we have final results
     if state.get("backtest_results") is not None:
         # Pipeline completed - show results
+        st.session_state.pipeline_complete = True
         spec = state.get("spec")
         results_df = state.get("backtest_results")
         metrics = state.get("metrics", {})
@@ -347,9 +423,11 @@ def main():
 
         with left:
             st.subheader("Equity Curve")
-            fig = plot_equity_curve(results_df)
+            # The chart plots date against equity, so both go into the fingerprint
+            df_hash = int(pd.util.hash_pandas_object(results_df[["date", "equity_curve"]], index=False).sum())
+            png = _cached_equity_png(df_hash, results_df)
             logger.info("Plotting completed successfully")
-            st.pyplot(fig, clear_figure=True)
+            st.image(png)
 
         with right:
             st.subheader("Performance Metrics")
@@ -364,12 +442,17 @@ def main():
         st.subheader("🔍 Trade-by-Trade Debugger")
 
         if trades:
-            trades_df = trades_to_dataframe(trades)
+            trades_df = _cached_trades_df(trades)
             
-            # Summary stats
-            winning_trades = sum(1 for t in trades if t.pnl_pct and t.pnl_pct > 0)
-            losing_trades = sum(1 for t in trades if t.pnl_pct and t.pnl_pct < 0)
-            avg_pnl = sum(t.pnl_pct for t in trades if t.pnl_pct) / len(trades) if trades else 0
+            # Summary stats (vectorized; trades_df only holds formatted strings)
+            pnl = np.fromiter(
+                (np.nan if t.pnl_pct is None else t.pnl_pct for t in trades),
+                dtype=np.float64,
+                count=len(trades),
+            )
+            winning_trades = int(np.count_nonzero(pnl > 0))
+            losing_trades = int(np.count_nonzero(pnl < 0))
+            avg_pnl = float(np.nansum(pnl)) / len(trades)
 
             col1, col2, col3, col4 = st.columns(4)
             col1.metric("Total Trades", len(trades))
@@ -420,7 +503,7 @@ def main():
         # Pipeline is running after confirmation or completed
         # First, try to refresh state from checkpoint to get latest
         try:
-            updated_state = get_pipeline_state(st.session_state.pipeline_session_id)
+            updated_state = _cached_state(st.session_state.pipeline_session_id)
             if updated_state:
                 st.session_state.pipeline_state = updated_state
                 state = updated_state
@@ -447,9 +530,10 @@ def main():
             # Show a button to manually refresh
             if st.button("🔄 Refresh Status"):
                 # Force refresh from checkpoint
+                _cached_state.clear()
                 try:
                     logger.info(f"Refreshing pipeline state for session {st.session_state.pipeline_session_id}")
-                    refreshed_state = get_pipeline_state(st.session_state.pipeline_session_id)
+                    refreshed_state = _cached_state(st.session_state.pipeline_session_id)
                     if refreshed_state:
                         logger.info(f"Refreshed state - current_step: {refreshed_state.get('current_step')}, has_backtest_results: {refreshed_state.get('backtest_results') is not None}, errors: {refreshed_state.get('errors')}")
                         st.session_state.pipeline_state = refreshed_state
@@ -464,16 +548,16 @@ def main():
                         st.warning("No pipeline state found. Please run the pipeline again.")
                         logger.warning("No state found when refreshing")
                 except Exception as e:
-                    logger.error(f"Error refreshing pipeline state: {e}")
-                    import traceback
-                    logger.error(traceback.format_exc())
+                    logger.error(f"Error refreshing pipeline state: {e}", exc_info=True)
                     st.error(f"Error refreshing state: {e}")
             
             st.stop()  # Stop here to prevent infinite reruns
         else:
-            # Pipeline completed - results should be shown above
-            # This shouldn't be reached if backtest_results exists
-            st.rerun()
+            # Pipeline completed after the refresh above - rerun once so the
+            # results branch renders, but never loop on the terminal state
+            if not st.session_state.pipeline_complete:
+                st.session_state.pipeline_complete = True
+                st.rerun()
 
 
 if __name__ == "__main__":
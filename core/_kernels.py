@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to plain Python loops
+    njit = None
+
+
+def _state_machine(entry_mask: np.ndarray, exit_mask: np.ndarray) -> np.ndarray:
+    """Walk precomputed entry/exit masks and return the long/flat position per bar."""
+    n = entry_mask.shape[0]
+    positions = np.zeros(n, np.float64)
+    pos = 0.0
+    for i in range(n):
+        if pos == 0.0 and entry_mask[i]:
+            pos = 1.0
+        elif pos == 1.0 and exit_mask[i]:
+            pos = 0.0
+        positions[i] = pos
+    return positions
+
+
+if njit is not None:
+    run_state_machine = njit(cache=True, nogil=True)(_state_machine)
+else:
+    run_state_machine = _state_machine
+
+
+# One row per rule for the fused kernel. col_a < 0 marks a rule that can never
+# fire (unknown type or missing feature columns).
+RULE_DTYPE = np.dtype([
+    ("col_a", np.int32),
+    ("col_b", np.int32),
+    ("greater", np.bool_),
+    ("has_lookahead", np.bool_),
+    ("lookahead", np.int64),
+    ("has_duration", np.bool_),
+    ("duration", np.int64),
+])
+
+
+def _compare_at(values, rule, j):
+    a = values[j, rule.col_a]
+    b = values[j, rule.col_b]
+    if np.isnan(a) or np.isnan(b):
+        return False
+    return a > b if rule.greater else a < b
+
+
+def _any_ahead(values, rule, i):
+    n = values.shape[0]
+    if rule.lookahead < 0:
+        return False
+    for j in range(i, min(i + rule.lookahead + 1, n)):
+        if _compare_at(values, rule, j):
+            return True
+    return False
+
+
+def _rule_at(values, rule, i):
+    """A rule's full signal at bar i, with its duration/lookahead constraint."""
+    if rule.col_a < 0:
+        return False
+    if rule.has_duration:
+        if rule.duration <= 0:
+            return True
+        if i < rule.duration - 1:
+            return False
+        for j in range(i - rule.duration + 1, i + 1):
+            if not _compare_at(values, rule, j):
+                return False
+        return True
+    if rule.has_lookahead:
+        return _any_ahead(values, rule, i)
+    return _compare_at(values, rule, i)
+
+
+def _entry_at(values, rules, sequential, i):
+    if sequential:
+        if rules.shape[0] == 0 or rules[0].col_a < 0 or not _compare_at(values, rules[0], i):
+            return False
+        for r in range(1, rules.shape[0]):
+            rule = rules[r]
+            if rule.col_a < 0:
+                return False
+            hit = _any_ahead(values, rule, i) if rule.has_lookahead else _compare_at(values, rule, i)
+            if not hit:
+                return False
+        return True
+    for r in range(rules.shape[0]):
+        if not _rule_at(values, rules[r], i):
+            return False
+    return True
+
+
+def _exit_at(values, rules, i):
+    for r in range(rules.shape[0]):
+        if _rule_at(values, rules[r], i):
+            return True
+    return False
+
+
+def _fused_positions(values, entry_rules, exit_rules, sequential):
+    """Evaluate the rules and the position state machine in one pass over the bars.
+
+    Only the side that can act is evaluated: entries while flat, exits while long.
+    """
+    n = values.shape[0]
+    positions = np.zeros(n, np.float64)
+    pos = 0.0
+    for i in range(n):
+        if pos == 0.0:
+            if _entry_at(values, entry_rules, sequential, i):
+                pos = 1.0
+        elif _exit_at(values, exit_rules, i):
+            pos = 0.0
+        positions[i] = pos
+    return positions
+
+
+def _any_signals(values, entry_rules, exit_rules, sequential):
+    """Whether the entry and exit signals fire on any bar, stopping once both have."""
+    any_entry = False
+    any_exit = False
+    for i in range(values.shape[0]):
+        if not any_entry and _entry_at(values, entry_rules, sequential, i):
+            any_entry = True
+        if not any_exit and _exit_at(values, exit_rules, i):
+            any_exit = True
+        if any_entry and any_exit:
+            break
+    return any_entry, any_exit
+
+
+if njit is not None:
+    _compare_at = njit(cache=True, nogil=True)(_compare_at)
+    _any_ahead = njit(cache=True, nogil=True)(_any_ahead)
+    _rule_at = njit(cache=True, nogil=True)(_rule_at)
+    _entry_at = njit(cache=True, nogil=True)(_entry_at)
+    _exit_at = njit(cache=True, nogil=True)(_exit_at)
+    fused_positions = njit(cache=True, nogil=True)(_fused_positions)
+    any_signals = njit(cache=True, nogil=True)(_any_signals)
+else:
+    fused_positions = None  # without numba the vectorized mask path is faster
+    any_signals = None
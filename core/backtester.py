@@ -1,15 +1,16 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
 
+from ._kernels import RULE_DTYPE, any_signals, fused_positions, run_state_machine
 from .strategy_spec import StrategySpec, CrossoverRule, VolFilterRule, Rule
 
 
-@dataclass
+@dataclass(slots=True)
 class Trade:
     """Represents a single completed trade."""
     entry_date: str
@@ -21,280 +22,275 @@ class Trade:
     pnl_pct: Optional[float] = None
 
 
-def _to_scalar(val):
-    """Convert a pandas Series or numpy array to a Python scalar."""
-    if isinstance(val, pd.Series):
-        return float(val.iloc[0]) if len(val) > 0 else 0.0
-    elif hasattr(val, 'item'):
-        return val.item()
-    return float(val)
-
-
-def _format_crossover_reason(rule: CrossoverRule, row: pd.Series, is_entry: bool) -> str:
-    """Format a human-readable reason for a crossover rule trigger."""
-    fast_col = f"ma_{rule.fast_ma}"
-    slow_col = f"ma_{rule.slow_ma}"
-    fast_val = _to_scalar(row[fast_col])
-    slow_val = _to_scalar(row[slow_col])
+def _format_crossover_reasons(
+    rule: CrossoverRule, fast_vals: np.ndarray, slow_vals: np.ndarray, is_entry: bool
+) -> List[str]:
+    """Format human-readable reasons for crossover triggers, one per value pair."""
     action = "Entry" if is_entry else "Exit"
     direction = "above" if rule.direction == "above" else "below"
-    return f"{action}: {rule.fast_ma}-day MA ({fast_val:.2f}) crossed {direction} {rule.slow_ma}-day MA ({slow_val:.2f})"
-
-
-def _format_vol_filter_reason(rule: VolFilterRule, row: pd.Series, is_entry: bool) -> str:
-    """Format a human-readable reason for a volatility filter trigger."""
-    rv_col = f"rv_{rule.window}"
-    med_col = f"rv_{rule.window}_med_252"
-    rv_val = _to_scalar(row[rv_col])
-    med_val = _to_scalar(row[med_col])
+    head = f"{action}: {rule.fast_ma}-day MA ("
+    mid = f") crossed {direction} {rule.slow_ma}-day MA ("
+    # Numbers are formatted in one vectorized pass; per reason it's only concatenation
+    fast_strs = np.char.mod("%.2f", fast_vals).tolist()
+    slow_strs = np.char.mod("%.2f", slow_vals).tolist()
+    return [head + f + mid + s + ")" for f, s in zip(fast_strs, slow_strs)]
+
+
+def _format_vol_filter_reasons(
+    rule: VolFilterRule, rv_vals: np.ndarray, med_vals: np.ndarray, is_entry: bool
+) -> List[str]:
+    """Format human-readable reasons for volatility filter triggers, one per value pair."""
     action = "Entry" if is_entry else "Exit"
     relation = "below" if rule.relation == "below" else "above"
-    return f"{action}: {rule.window}-day RV ({rv_val:.2%}) {relation} 1Y median ({med_val:.2%})"
-
-
-def _get_triggered_rules(
-    rules: List[Rule], row_idx: int, df: pd.DataFrame, is_entry: bool
-) -> Tuple[bool, List[str]]:
-    """Evaluate rules and return (all_passed, list of triggered rule reasons)."""
-    row = df.iloc[row_idx]
-    reasons = []
-    all_passed = True
-
-    for rule in rules:
-        if isinstance(rule, CrossoverRule):
-            passed = _evaluate_crossover(rule, row_idx, df)
-            if passed:
-                reasons.append(_format_crossover_reason(rule, row, is_entry))
-        elif isinstance(rule, VolFilterRule):
-            passed = _evaluate_vol_filter(rule, row_idx, df)
-            if passed:
-                reasons.append(_format_vol_filter_reason(rule, row, is_entry))
-        else:
-            passed = False
+    head = f"{action}: {rule.window}-day RV ("
+    mid = f") {relation} 1Y median ("
+    rv_strs = np.char.mod("%.2f%%", rv_vals * 100).tolist()
+    med_strs = np.char.mod("%.2f%%", med_vals * 100).tolist()
+    return [head + r + mid + m + ")" for r, m in zip(rv_strs, med_strs)]
 
-        if not passed:
-            all_passed = False
 
-    return all_passed, reasons
+def _compare(a: np.ndarray, b: np.ndarray, greater: bool) -> np.ndarray:
+    """Elementwise `a > b` (or `a < b`), False wherever either side is NaN."""
+    valid = ~(np.isnan(a) | np.isnan(b))
+    return valid & (a > b) if greater else valid & (a < b)
 
 
-def _evaluate_crossover(rule: CrossoverRule, row_idx: int, df: pd.DataFrame) -> bool:
-    """Evaluate crossover rule, supporting lookahead and duration constraints."""
-    fast_col = f"ma_{rule.fast_ma}"
-    slow_col = f"ma_{rule.slow_ma}"
-    if fast_col not in df.columns or slow_col not in df.columns:
-        return False
-    
-    n = len(df)
-    
-    # Handle duration requirement: condition must be true for N consecutive days
+def _column_array(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Return a column as a 1-D float64 array (first column if yfinance left it 2-D)."""
+    values = df[col].to_numpy(dtype=np.float64)
+    if values.ndim > 1:
+        values = values[:, 0]
+    return values
+
+
+@dataclass
+class CompiledRule:
+    """A rule evaluated once over the whole frame, ready for integer-indexed reads."""
+    base: np.ndarray  # comparison per bar, ignoring lookahead/duration
+    mask: np.ndarray  # comparison per bar with lookahead/duration applied
+    lookahead_days: Optional[int]
+    format_reasons: Callable[[np.ndarray, bool], List[str]]  # (row indices, is_entry) -> reasons
+
+
+def _window_all(mask: np.ndarray, duration: int) -> np.ndarray:
+    """True where mask held on each of the last `duration` bars (inclusive)."""
+    n = len(mask)
+    if duration <= 0:
+        return np.ones(n, dtype=bool)
+    counts = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    out = np.zeros(n, dtype=bool)
+    if duration <= n:
+        out[duration - 1:] = (counts[duration:] - counts[:n - duration + 1]) == duration
+    return out
+
+
+def _window_any(mask: np.ndarray, lookahead: int) -> np.ndarray:
+    """True where mask holds on any of the next `lookahead` bars (inclusive, truncated at the end)."""
+    n = len(mask)
+    if lookahead < 0:
+        return np.zeros(n, dtype=bool)
+    counts = np.concatenate(([0], np.cumsum(mask, dtype=np.int64)))
+    idx = np.arange(n)
+    hi = np.minimum(idx + lookahead + 1, n)
+    return (counts[hi] - counts[idx]) > 0
+
+
+def _rule_columns(rule: Rule) -> Optional[Tuple[str, str, bool, Callable[..., str]]]:
+    """The (a_col, b_col, a_greater, formatter) a rule compares, or None for unknown rule types."""
+    if isinstance(rule, CrossoverRule):
+        return f"ma_{rule.fast_ma}", f"ma_{rule.slow_ma}", rule.direction == "above", _format_crossover_reasons
+    if isinstance(rule, VolFilterRule):
+        return (
+            f"rv_{rule.window}", f"rv_{rule.window}_med_252", rule.relation != "below", _format_vol_filter_reasons
+        )
+    return None
+
+
+@dataclass
+class FeatureBlock:
+    """The feature columns a spec reads, packed into one 2-D float64 array.
+
+    Stored column-major so each feature is a contiguous view, looked up through
+    a small name -> column map instead of the DataFrame's block manager.
+    """
+    columns: Dict[str, int]
+    values: np.ndarray
+
+    @classmethod
+    def from_rules(cls, df: pd.DataFrame, rules: List[Rule]) -> "FeatureBlock":
+        names: Dict[str, None] = {}
+        for rule in rules:
+            cols = _rule_columns(rule)
+            if cols is not None:
+                names.update((col, None) for col in cols[:2] if col in df.columns)
+        columns = {col: j for j, col in enumerate(names)}
+        values = np.empty((len(df), len(columns)), dtype=np.float64, order="F")
+        for col, j in columns.items():
+            values[:, j] = _column_array(df, col)
+        return cls(columns, values)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __contains__(self, col: str) -> bool:
+        return col in self.columns
+
+    def column(self, col: str) -> np.ndarray:
+        return self.values[:, self.columns[col]]
+
+
+def _compile_rule(rule: Rule, block: FeatureBlock) -> CompiledRule:
+    """Resolve a rule's columns and masks once so hot loops never dispatch on its type."""
+    cols = _rule_columns(rule)
+    if cols is None or cols[0] not in block or cols[1] not in block:
+        # Never fires, so its reason is never formatted
+        base = np.zeros(len(block), dtype=bool)
+        return CompiledRule(base, base, rule.lookahead_days, lambda idx, is_entry: [""] * len(idx))
+
+    a_col, b_col, greater, formatter = cols
+    a = block.column(a_col)
+    b = block.column(b_col)
+    base = _compare(a, b, greater)
+
     if rule.duration_days is not None:
-        duration = rule.duration_days
-        if row_idx < duration - 1:
-            return False
-        for offset in range(duration):
-            check_idx = row_idx - offset
-            if check_idx < 0:
-                return False
-            row = df.iloc[check_idx]
-            fast = row[fast_col]
-            slow = row[slow_col]
-            if isinstance(fast, pd.Series):
-                fast = fast.item() if len(fast) == 1 else fast.iloc[0]
-            if isinstance(slow, pd.Series):
-                slow = slow.item() if len(slow) == 1 else slow.iloc[0]
-            if pd.isna(fast) or pd.isna(slow):
-                return False
-            condition_met = (fast > slow) if rule.direction == "above" else (fast < slow)
-            if not condition_met:
-                return False
-        return True
-    
-    # Handle lookahead: check if condition is true within next N days
-    if rule.lookahead_days is not None:
-        lookahead = rule.lookahead_days
-        for offset in range(lookahead + 1):
-            check_idx = row_idx + offset
-            if check_idx >= n:
-                continue
-            row = df.iloc[check_idx]
-            fast = row[fast_col]
-            slow = row[slow_col]
-            if isinstance(fast, pd.Series):
-                fast = fast.item() if len(fast) == 1 else fast.iloc[0]
-            if isinstance(slow, pd.Series):
-                slow = slow.item() if len(slow) == 1 else slow.iloc[0]
-            if pd.isna(fast) or pd.isna(slow):
-                continue
-            condition_met = (fast > slow) if rule.direction == "above" else (fast < slow)
-            if condition_met:
-                return True
-        return False
-    
-    # Standard evaluation: check current row only
-    row = df.iloc[row_idx]
-    fast = row[fast_col]
-    slow = row[slow_col]
-    if isinstance(fast, pd.Series):
-        fast = fast.item() if len(fast) == 1 else fast.iloc[0]
-    if isinstance(slow, pd.Series):
-        slow = slow.item() if len(slow) == 1 else slow.iloc[0]
-    if pd.isna(fast) or pd.isna(slow):
-        return False
-    if rule.direction == "above":
-        return bool(fast > slow)
+        mask = _window_all(base, rule.duration_days)
+    elif rule.lookahead_days is not None:
+        mask = _window_any(base, rule.lookahead_days)
     else:
-        return bool(fast < slow)
+        mask = base
+    return CompiledRule(
+        base, mask, rule.lookahead_days, lambda idx, is_entry: formatter(rule, a[idx], b[idx], is_entry)
+    )
+
+
+def _entry_mask(rules: List[CompiledRule], sequential: bool, n: int) -> np.ndarray:
+    """Per-bar entry signal: all entry rules true, or the sequential-entry variant."""
+    if sequential:
+        if not rules:
+            return np.zeros(n, dtype=bool)
+        # First rule on the current bar, later rules within their lookahead windows
+        masks = [rules[0].base]
+        for rule in rules[1:]:
+            masks.append(rule.base if rule.lookahead_days is None else _window_any(rule.base, rule.lookahead_days))
+        return np.logical_and.reduce(masks)
+    if not rules:
+        return np.ones(n, dtype=bool)
+    return np.logical_and.reduce([rule.mask for rule in rules])
 
 
-def _evaluate_vol_filter(rule: VolFilterRule, row_idx: int, df: pd.DataFrame) -> bool:
-    """Evaluate volatility filter rule, supporting lookahead and duration constraints."""
-    rv_col = f"rv_{rule.window}"
-    med_col = f"rv_{rule.window}_med_252"
-    if rv_col not in df.columns or med_col not in df.columns:
-        return False
-    
+def _exit_mask(rules: List[CompiledRule], n: int) -> np.ndarray:
+    """Per-bar exit signal: any exit rule true."""
+    if not rules:
+        return np.zeros(n, dtype=bool)
+    return np.logical_or.reduce([rule.mask for rule in rules])
+
+
+@dataclass
+class BacktestResult:
+    """Backtest output plus the intermediate arrays extract_trades can reuse."""
+    df: pd.DataFrame
+    entry_mask: np.ndarray
+    exit_mask: np.ndarray
+    positions: np.ndarray
+    compiled_entry: List[CompiledRule]
+    compiled_exit: List[CompiledRule]
+
+
+def _compile_spec(spec: StrategySpec, df: pd.DataFrame) -> Tuple[List[CompiledRule], List[CompiledRule]]:
+    """Compile the spec's entry and exit rules against df's feature columns."""
+    block = FeatureBlock.from_rules(df, spec.entry_rules + spec.exit_rules)
+    return (
+        [_compile_rule(rule, block) for rule in spec.entry_rules],
+        [_compile_rule(rule, block) for rule in spec.exit_rules],
+    )
+
+
+def _signal_masks(spec: StrategySpec, df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-bar (entry, exit) signals for spec on df, before any position logic."""
+    compiled_entry, compiled_exit = _compile_spec(spec, df)
     n = len(df)
-    
-    # Handle duration requirement: condition must be true for N consecutive days
-    if rule.duration_days is not None:
-        duration = rule.duration_days
-        if row_idx < duration - 1:
-            return False
-        for offset in range(duration):
-            check_idx = row_idx - offset
-            if check_idx < 0:
-                return False
-            row = df.iloc[check_idx]
-            rv = row[rv_col]
-            med = row[med_col]
-            if isinstance(rv, pd.Series):
-                rv = rv.item() if len(rv) == 1 else rv.iloc[0]
-            if isinstance(med, pd.Series):
-                med = med.item() if len(med) == 1 else med.iloc[0]
-            if pd.isna(rv) or pd.isna(med):
-                return False
-            condition_met = (rv < med) if rule.relation == "below" else (rv > med)
-            if not condition_met:
-                return False
-        return True
-    
-    # Handle lookahead: check if condition is true within next N days
-    if rule.lookahead_days is not None:
-        lookahead = rule.lookahead_days
-        for offset in range(lookahead + 1):
-            check_idx = row_idx + offset
-            if check_idx >= n:
-                continue
-            row = df.iloc[check_idx]
-            rv = row[rv_col]
-            med = row[med_col]
-            if isinstance(rv, pd.Series):
-                rv = rv.item() if len(rv) == 1 else rv.iloc[0]
-            if isinstance(med, pd.Series):
-                med = med.item() if len(med) == 1 else med.iloc[0]
-            if pd.isna(rv) or pd.isna(med):
-                continue
-            condition_met = (rv < med) if rule.relation == "below" else (rv > med)
-            if condition_met:
-                return True
-        return False
-    
-    # Standard evaluation: check current row only
-    row = df.iloc[row_idx]
-    rv = row[rv_col]
-    med = row[med_col]
-    if isinstance(rv, pd.Series):
-        rv = rv.item() if len(rv) == 1 else rv.iloc[0]
-    if isinstance(med, pd.Series):
-        med = med.item() if len(med) == 1 else med.iloc[0]
-    if pd.isna(rv) or pd.isna(med):
-        return False
-    if rule.relation == "below":
-        return bool(rv < med)
-    else:
-        return bool(rv > med)
+    return _entry_mask(compiled_entry, spec.entry_sequential, n), _exit_mask(compiled_exit, n)
 
 
-def _evaluate_rules(rules: List[Rule], row_idx: int, df: pd.DataFrame) -> bool:
-    """Entry rules: all must be true. Exit rules use a different pattern."""
-    result = True
-    for rule in rules:
-        if isinstance(rule, CrossoverRule):
-            cond = _evaluate_crossover(rule, row_idx, df)
-        elif isinstance(rule, VolFilterRule):
-            cond = _evaluate_vol_filter(rule, row_idx, df)
-        else:
-            cond = False
-        result = result and cond
-        if not result:
-            return False
-    return result
+def _simulate(df: pd.DataFrame, spec: StrategySpec) -> BacktestResult:
+    """Compile the rules against df (RangeIndex) and run the position state machine."""
+    # Evaluate every rule once over the whole history, then walk the masks
+    # in the (JIT-compiled when numba is installed) state machine
+    n = len(df)
+    compiled_entry, compiled_exit = _compile_spec(spec, df)
+    entry_mask = _entry_mask(compiled_entry, spec.entry_sequential, n)
+    exit_mask = _exit_mask(compiled_exit, n)
+    positions = run_state_machine(entry_mask, exit_mask)
+    return BacktestResult(df, entry_mask, exit_mask, positions, compiled_entry, compiled_exit)
+
+
+def _encode_rules(rules: List[Rule], block: FeatureBlock) -> np.ndarray:
+    """Pack rules into the RULE_DTYPE records the fused kernel reads."""
+    encoded = np.zeros(len(rules), dtype=RULE_DTYPE)
+    for k, rule in enumerate(rules):
+        cols = _rule_columns(rule)
+        if cols is None or cols[0] not in block or cols[1] not in block:
+            encoded[k]["col_a"] = encoded[k]["col_b"] = -1
+            continue
+        encoded[k]["col_a"] = block.columns[cols[0]]
+        encoded[k]["col_b"] = block.columns[cols[1]]
+        encoded[k]["greater"] = cols[2]
+        encoded[k]["has_lookahead"] = rule.lookahead_days is not None
+        encoded[k]["lookahead"] = rule.lookahead_days or 0
+        encoded[k]["has_duration"] = rule.duration_days is not None
+        encoded[k]["duration"] = rule.duration_days or 0
+    return encoded
+
+
+def _signal_presence(spec: StrategySpec, df: pd.DataFrame) -> Tuple[bool, bool]:
+    """Whether the entry / exit signals fire on any bar of df."""
+    if any_signals is None:
+        entry_mask, exit_mask = _signal_masks(spec, df)
+        return bool(entry_mask.any()), bool(exit_mask.any())
+
+    # With numba, scan the feature block directly and stop at the first bar
+    # where both have fired instead of building full-length masks
+    block = FeatureBlock.from_rules(df, spec.entry_rules + spec.exit_rules)
+    any_entry, any_exit = any_signals(
+        block.values,
+        _encode_rules(spec.entry_rules, block),
+        _encode_rules(spec.exit_rules, block),
+        spec.entry_sequential,
+    )
+    return bool(any_entry), bool(any_exit)
+
+
+def _prepare_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame with a 0..n-1 index that new columns can be written to without touching df."""
+    # Only new columns are written, so a shallow copy is enough to keep the caller's frame intact
+    if df.index.equals(pd.RangeIndex(len(df))):
+        return df.copy(deep=False)
+    return df.reset_index(drop=True)
+
+
+def _add_returns(df: pd.DataFrame, positions: np.ndarray) -> pd.DataFrame:
+    """Attach position, strategy return and equity curve columns."""
+    # Strategy return: use previous day's position on today's return
+    returns = _column_array(df, "return")
+    strategy_return = np.empty_like(returns)
+    strategy_return[:1] = 0.0
+    np.multiply(positions[:-1], returns[1:], out=strategy_return[1:])
 
+    df["position"] = positions
+    df["strategy_return"] = strategy_return
+    df["equity_curve"] = np.cumprod(1.0 + strategy_return)
+    return df
 
-def _evaluate_rule_at_index(rule: Rule, row_idx: int, df: pd.DataFrame) -> bool:
-    """Evaluate a rule at a specific index, ignoring lookahead/duration constraints."""
-    if isinstance(rule, CrossoverRule):
-        # Temporarily disable lookahead and duration to check specific day
-        original_lookahead = rule.lookahead_days
-        original_duration = rule.duration_days
-        rule.lookahead_days = None
-        rule.duration_days = None
-        result = _evaluate_crossover(rule, row_idx, df)
-        rule.lookahead_days = original_lookahead
-        rule.duration_days = original_duration
-        return result
-    elif isinstance(rule, VolFilterRule):
-        original_lookahead = rule.lookahead_days
-        original_duration = rule.duration_days
-        rule.lookahead_days = None
-        rule.duration_days = None
-        result = _evaluate_vol_filter(rule, row_idx, df)
-        rule.lookahead_days = original_lookahead
-        rule.duration_days = original_duration
-        return result
-    return False
-
-
-def _evaluate_sequential_entry(rules: List[Rule], row_idx: int, df: pd.DataFrame) -> bool:
-    """Evaluate sequential entry rules: first rule must trigger, then subsequent rules within their lookahead windows.
-    
-    Returns True if:
-    - First rule triggers at row_idx (ignoring its lookahead if present)
-    - Each subsequent rule triggers within its lookahead_days window (starting from row_idx)
-    - If a rule has no lookahead_days, it must trigger at the same time as the first rule
+
+def run_backtest_detailed(df: pd.DataFrame, spec: StrategySpec) -> BacktestResult:
+    """Like run_backtest, but also returns the masks, positions and compiled rules.
+
+    Pass the result to extract_trades to build the trade log without
+    re-evaluating the strategy.
     """
-    if not rules:
-        return False
-    
-    n = len(df)
-    
-    # First rule must trigger at current row (check without lookahead)
-    first_rule = rules[0]
-    if not _evaluate_rule_at_index(first_rule, row_idx, df):
-        return False
-    
-    # For subsequent rules, check if they trigger within their lookahead windows
-    for rule in rules[1:]:
-        if rule.lookahead_days is None:
-            # No lookahead: must trigger at same time as first rule
-            if not _evaluate_rule_at_index(rule, row_idx, df):
-                return False
-        else:
-            # Has lookahead: check if it triggers within the window (including same day)
-            lookahead = rule.lookahead_days
-            rule_triggered = False
-            for offset in range(lookahead + 1):  # Include same day (offset 0)
-                check_idx = row_idx + offset
-                if check_idx >= n:
-                    break
-                if _evaluate_rule_at_index(rule, check_idx, df):
-                    rule_triggered = True
-                    break
-            if not rule_triggered:
-                return False
-    
-    return True
+    result = _simulate(_prepare_frame(df), spec)
+    _add_returns(result.df, result.positions)
+    return result
 
 
 def run_backtest(df: pd.DataFrame, spec: StrategySpec) -> pd.DataFrame:
@@ -305,158 +301,127 @@ def run_backtest(df: pd.DataFrame, spec: StrategySpec) -> pd.DataFrame:
     - Exit: when any exit rule is true.
     - Position changes at the close, impacting next day's return.
     """
-    df = df.copy().reset_index(drop=True)
-    n = len(df)
-    positions = np.zeros(n, dtype=float)
-
-    position = 0.0
-
-    for i in range(n):
-        # Entry: use sequential evaluation if enabled, otherwise standard evaluation
-        if spec.entry_sequential:
-            entry_ok = _evaluate_sequential_entry(spec.entry_rules, i, df)
-        else:
-            entry_ok = _evaluate_rules(spec.entry_rules, i, df)
-
-        # Exit: any exit rule true -> exit
-        exit_ok = False
-        for rule in spec.exit_rules:
-            if isinstance(rule, CrossoverRule):
-                if _evaluate_crossover(rule, i, df):
-                    exit_ok = True
-                    break
-            elif isinstance(rule, VolFilterRule):
-                if _evaluate_vol_filter(rule, i, df):
-                    exit_ok = True
-                    break
-
-        if position == 0.0 and entry_ok:
-            position = 1.0
-        elif position == 1.0 and exit_ok:
-            position = 0.0
-
-        positions[i] = position
-
-    df["position"] = positions
-
-    # Strategy return: use previous day's position on today's return
-    df["strategy_return"] = df["position"].shift(1).fillna(0.0) * df["return"]
-    df["equity_curve"] = (1.0 + df["strategy_return"]).cumprod()
-
-    return df
-
+    df = _prepare_frame(df)
+    if fused_positions is None:
+        return _add_returns(df, _simulate(df, spec).positions)
+
+    # With numba, rules and the state machine run as one kernel over the feature
+    # block, without materializing per-rule masks
+    block = FeatureBlock.from_rules(df, spec.entry_rules + spec.exit_rules)
+    positions = fused_positions(
+        block.values,
+        _encode_rules(spec.entry_rules, block),
+        _encode_rules(spec.exit_rules, block),
+        spec.entry_sequential,
+    )
+    return _add_returns(df, positions)
+
+
+def _date_strings(df: pd.DataFrame) -> np.ndarray:
+    """Per-bar YYYY-MM-DD labels (bar index when there is no date column)."""
+    if "date" not in df.columns:
+        return np.arange(len(df)).astype(str)
+    dates = df["date"]
+    if pd.api.types.is_datetime64_dtype(dates):
+        return np.datetime_as_string(dates.to_numpy(dtype="datetime64[D]"), unit="D")
+    return np.array(
+        [d.strftime('%Y-%m-%d') if hasattr(d, 'strftime') else str(d)[:10] for d in dates],
+        dtype=object,
+    )
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """For each bar, the index of the first True at or after it (len(mask) if none)."""
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def _add_reasons(
+    parts: List[List[str]], trade_idx: np.ndarray, bars: np.ndarray, rule: CompiledRule, is_entry: bool
+) -> None:
+    """Append rule's reasons at `bars` to the reason lists of the matching trades."""
+    for k, reason in zip(trade_idx.tolist(), rule.format_reasons(bars, is_entry)):
+        parts[k].append(reason)
+
+
+def _entry_reasons(rules: List[CompiledRule], sequential: bool, entries: np.ndarray) -> List[List[str]]:
+    """Reasons for each entry bar, mirroring how the entry signal was evaluated."""
+    parts: List[List[str]] = [[] for _ in range(len(entries))]
+    every = np.arange(len(entries))
+    if not sequential:
+        for rule in rules:
+            _add_reasons(parts, every, entries, rule, True)
+        return parts
+    if not rules:
+        return parts
 
-def extract_trades(df: pd.DataFrame, spec: StrategySpec) -> List[Trade]:
+    # Sequential: first rule at the entry bar, later rules where they first fired in their windows
+    _add_reasons(parts, every, entries, rules[0], True)
+    for rule in rules[1:]:
+        lookahead = rule.lookahead_days if rule.lookahead_days is not None else 0
+        hit_bars = _next_true(rule.base)[entries]
+        hit = (hit_bars < len(rule.base)) & (hit_bars - entries <= lookahead) & (lookahead >= 0)
+        if rule.lookahead_days is None:
+            # No window: reason at the entry bar itself whether or not it hit
+            hit_bars = np.where(hit, hit_bars, entries)
+            hit = np.ones(len(entries), dtype=bool)
+        _add_reasons(parts, every[hit], hit_bars[hit], rule, True)
+    return parts
+
+
+def extract_trades(
+    df: pd.DataFrame,
+    spec: StrategySpec,
+    result: Optional[BacktestResult] = None,
+) -> List[Trade]:
     """Extract detailed trade log from backtest results.
 
     Returns a list of Trade objects with entry/exit dates, prices, and reasons.
+    Pass the BacktestResult from run_backtest_detailed to reuse its compiled
+    rules and positions instead of re-evaluating the strategy on df.
     """
-    df = df.copy().reset_index(drop=True)
-    n = len(df)
+    if result is None:
+        result = _simulate(df, spec)  # read-only: positions are positional, so no reindex/copy
+    df = result.df
+    date_strs = _date_strings(df)
+    close = _column_array(df, "close")
+
+    # Position flips: 0 -> 1 is an entry bar, 1 -> 0 an exit bar; only these bars are visited
+    trans = np.diff(result.positions, prepend=0.0)
+    entries = np.flatnonzero(trans == 1.0)
+    exits = np.flatnonzero(trans == -1.0)
+
+    entry_parts = _entry_reasons(result.compiled_entry, spec.entry_sequential, entries)
+
+    # Each exit is attributed to the first exit rule that fired on its bar
+    exit_parts: List[List[str]] = [[] for _ in range(len(exits))]
+    unassigned = np.ones(len(exits), dtype=bool)
+    for rule in result.compiled_exit:
+        sel = np.flatnonzero(unassigned & rule.mask[exits])
+        _add_reasons(exit_parts, sel, exits[sel], rule, False)
+        unassigned[sel] = False
+
     trades: List[Trade] = []
-    current_trade: Optional[Trade] = None
-    position = 0.0
-
-    for i in range(n):
-        row = df.iloc[i]
-        # Handle date - could be a Series with MultiIndex from yfinance
-        if "date" in df.columns:
-            date_val = df["date"].iloc[i]
-            if hasattr(date_val, 'strftime'):
-                date_str = date_val.strftime('%Y-%m-%d')
-            else:
-                date_str = str(date_val)[:10]
-        else:
-            date_str = str(i)
-        # Handle close price - ensure scalar
-        close_price = float(df["close"].iloc[i])
-
-        # Check entry conditions
-        if spec.entry_sequential:
-            entry_ok = _evaluate_sequential_entry(spec.entry_rules, i, df)
-            # For sequential, collect reasons - first rule at current day, subsequent rules within their windows
-            entry_reasons = []
-            if entry_ok:
-                # First rule triggered at current day
-                first_rule = spec.entry_rules[0]
-                if isinstance(first_rule, CrossoverRule):
-                    entry_reasons.append(_format_crossover_reason(first_rule, row, is_entry=True))
-                elif isinstance(first_rule, VolFilterRule):
-                    entry_reasons.append(_format_vol_filter_reason(first_rule, row, is_entry=True))
-                
-                # Find when subsequent rules triggered within their lookahead windows
-                for rule in spec.entry_rules[1:]:
-                    found = False
-                    lookahead = rule.lookahead_days if rule.lookahead_days is not None else 0
-                    for offset in range(lookahead + 1):
-                        check_idx = i + offset
-                        if check_idx < len(df) and _evaluate_rule_at_index(rule, check_idx, df):
-                            check_row = df.iloc[check_idx]
-                            if isinstance(rule, CrossoverRule):
-                                entry_reasons.append(_format_crossover_reason(rule, check_row, is_entry=True))
-                            elif isinstance(rule, VolFilterRule):
-                                entry_reasons.append(_format_vol_filter_reason(rule, check_row, is_entry=True))
-                            found = True
-                            break
-                    if not found and rule.lookahead_days is None:
-                        # No lookahead, should have triggered at same time
-                        if isinstance(rule, CrossoverRule):
-                            entry_reasons.append(_format_crossover_reason(rule, row, is_entry=True))
-                        elif isinstance(rule, VolFilterRule):
-                            entry_reasons.append(_format_vol_filter_reason(rule, row, is_entry=True))
-        else:
-            entry_ok, entry_reasons = _get_triggered_rules(spec.entry_rules, i, df, is_entry=True)
-
-        # Check exit conditions (any exit rule)
-        exit_reasons = []
-        exit_ok = False
-        for rule in spec.exit_rules:
-            if isinstance(rule, CrossoverRule):
-                if _evaluate_crossover(rule, i, df):
-                    exit_reasons.append(_format_crossover_reason(rule, row, is_entry=False))
-                    exit_ok = True
-                    break
-            elif isinstance(rule, VolFilterRule):
-                if _evaluate_vol_filter(rule, i, df):
-                    exit_reasons.append(_format_vol_filter_reason(rule, row, is_entry=False))
-                    exit_ok = True
-                    break
-
-        # Handle state transitions
-        if position == 0.0 and entry_ok:
-            # Enter new trade
-            current_trade = Trade(
-                entry_date=date_str,
-                entry_price=close_price,
-                entry_reason=" | ".join(entry_reasons) if entry_reasons else "All entry rules satisfied",
-            )
-            position = 1.0
-
-        elif position == 1.0 and exit_ok and current_trade is not None:
-            # Exit current trade
-            current_trade.exit_date = date_str
-            current_trade.exit_price = close_price
-            current_trade.exit_reason = " | ".join(exit_reasons) if exit_reasons else "Exit rule triggered"
-            current_trade.pnl_pct = (close_price / current_trade.entry_price - 1) * 100
-            trades.append(current_trade)
-            current_trade = None
-            position = 0.0
-
-    # Handle open trade at end of backtest
-    if current_trade is not None and position == 1.0:
-        if "date" in df.columns:
-            date_val = df["date"].iloc[-1]
-            if hasattr(date_val, 'strftime'):
-                exit_date_str = date_val.strftime('%Y-%m-%d')
-            else:
-                exit_date_str = str(date_val)[:10]
+    for k, i in enumerate(entries.tolist()):
+        trade = Trade(
+            entry_date=str(date_strs[i]),
+            entry_price=float(close[i]),
+            entry_reason=" | ".join(entry_parts[k]) if entry_parts[k] else "All entry rules satisfied",
+        )
+
+        if k < len(exits):
+            j = int(exits[k])
+            trade.exit_date = str(date_strs[j])
+            trade.exit_price = float(close[j])
+            trade.exit_reason = " | ".join(exit_parts[k]) if exit_parts[k] else "Exit rule triggered"
         else:
-            exit_date_str = "End"
-        current_trade.exit_date = exit_date_str
-        current_trade.exit_price = float(df["close"].iloc[-1])
-        current_trade.exit_reason = "End of backtest period (still holding)"
-        current_trade.pnl_pct = (current_trade.exit_price / current_trade.entry_price - 1) * 100
-        trades.append(current_trade)
+            # Open trade at end of backtest
+            trade.exit_date = str(date_strs[-1]) if "date" in df.columns else "End"
+            trade.exit_price = float(close[-1])
+            trade.exit_reason = "End of backtest period (still holding)"
+        trade.pnl_pct = (trade.exit_price / trade.entry_price - 1) * 100
+        trades.append(trade)
 
     return trades
 
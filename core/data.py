@@ -1,16 +1,52 @@
 from __future__ import annotations
 
-from typing import Set
+import hashlib
+import os
+import threading
+import warnings
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import Callable, Tuple
 
 import numpy as np
 import pandas as pd
 import yfinance as yf
+from numpy.lib.stride_tricks import sliding_window_view
 
-from .strategy_spec import StrategySpec, CrossoverRule, VolFilterRule
+try:
+    import bottleneck as bn
+except ImportError:  # bottleneck is optional; fall back to NumPy window views
+    bn = None
 
+from .strategy_spec import StrategySpec
 
-def load_price_data(spec: StrategySpec) -> pd.DataFrame:
-    """Download OHLCV data for the given spec's ticker and date range."""
+# Downloaded prices are cached as Parquet, keyed by (ticker, start, end)
+PRICE_CACHE_DIR = Path(os.getenv("PRICE_CACHE_DIR", Path(__file__).parent.parent / ".price_cache"))
+
+# Rolling features are cached across calls (e.g. many specs over the same prices)
+ROLLING_CACHE_SIZE = 256
+_rolling_cache: "OrderedDict[Tuple, np.ndarray]" = OrderedDict()
+_rolling_cache_lock = threading.Lock()
+
+# Background price loads started by prefetch_price_data, consumed by load_price_data
+PREFETCH_SLOTS = 8
+_prefetched: "OrderedDict[Tuple[str, date, date], Future]" = OrderedDict()
+_prefetch_lock = threading.Lock()
+_prefetch_pool: "ThreadPoolExecutor | None" = None
+
+
+def _price_key(spec: StrategySpec) -> Tuple[str, date, date]:
+    return spec.ticker, spec.start_date, spec.end_date
+
+
+def _price_cache_path(spec: StrategySpec) -> Path:
+    return PRICE_CACHE_DIR / f"{spec.ticker}_{spec.start_date.isoformat()}_{spec.end_date.isoformat()}.parquet"
+
+
+def _download_price_data(spec: StrategySpec) -> pd.DataFrame:
+    """Download OHLCV data from yfinance and normalize it into the backtester's layout."""
     df = yf.download(
         spec.ticker,
         start=spec.start_date.isoformat(),
@@ -22,6 +58,10 @@ def load_price_data(spec: StrategySpec) -> pd.DataFrame:
     if df.empty:
         raise ValueError(f"No price data returned for {spec.ticker}.")
 
+    # Single-ticker downloads may carry a (field, ticker) column MultiIndex
+    if isinstance(df.columns, pd.MultiIndex):
+        df.columns = df.columns.get_level_values(0)
+
     df = df.rename(
         columns={
             "Open": "open",
@@ -39,42 +79,175 @@ def load_price_data(spec: StrategySpec) -> pd.DataFrame:
     return df
 
 
-def _required_ma_windows(spec: StrategySpec) -> Set[int]:
-    windows: Set[int] = set()
-    for rule in spec.entry_rules + spec.exit_rules:
-        if isinstance(rule, CrossoverRule):
-            windows.add(rule.fast_ma)
-            windows.add(rule.slow_ma)
-    return windows
+def prefetch_price_data(spec: StrategySpec) -> None:
+    """Start loading spec's prices in the background.
+
+    The next load_price_data call for the same ticker and range picks up the
+    result, e.g. after the user has confirmed the interpretation.
+    """
+    global _prefetch_pool
+    key = _price_key(spec)
+    with _prefetch_lock:
+        if key in _prefetched:
+            return
+        if _prefetch_pool is None:
+            _prefetch_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="price-prefetch")
+        _prefetched[key] = _prefetch_pool.submit(_load_price_data, spec)
+        while len(_prefetched) > PREFETCH_SLOTS:
+            _prefetched.popitem(last=False)  # never picked up (e.g. not confirmed)
+
+
+def load_price_data(spec: StrategySpec) -> pd.DataFrame:
+    """Load OHLCV data for the given spec's ticker and date range.
+
+    Served from a pending prefetch or the on-disk Parquet cache when possible;
+    otherwise downloaded and, once the range has fully elapsed, written back
+    to the cache.
+    """
+    with _prefetch_lock:
+        future = _prefetched.pop(_price_key(spec), None)
+    if future is not None:
+        try:
+            return future.result()
+        except Exception:
+            pass  # failed in the background: retry in the foreground, where errors surface
+
+    return _load_price_data(spec)
+
+
+def _load_price_data(spec: StrategySpec) -> pd.DataFrame:
+    cache_path = _price_cache_path(spec)
+    if cache_path.exists():
+        try:
+            return pd.read_parquet(cache_path, engine="pyarrow")
+        except Exception:
+            pass  # unreadable/partial cache file: fall through to the network
+
+    df = _download_price_data(spec)
+
+    # Ranges that end in the future are still filling in, so don't freeze them
+    if spec.end_date <= date.today():
+        try:
+            PRICE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            df.to_parquet(tmp_path, engine="pyarrow", index=False)
+            os.replace(tmp_path, cache_path)
+        except (ImportError, OSError):
+            pass  # pyarrow missing or cache dir not writable: just skip caching
+    return df
 
 
-def _required_vol_windows(spec: StrategySpec) -> Set[int]:
-    windows: Set[int] = set()
-    for rule in spec.entry_rules + spec.exit_rules:
-        if isinstance(rule, VolFilterRule):
-            windows.add(rule.window)
-    return windows
+def _trailing_windows(values: np.ndarray, window: int) -> np.ndarray:
+    """(n, window) view of trailing windows, NaN-padded so early rows see partial windows."""
+    padded = np.concatenate((np.full(window - 1, np.nan), values))
+    return sliding_window_view(padded, window)
+
+
+def _bn_window(values: np.ndarray, window: int) -> int:
+    """Clamp a window to the series length (bottleneck rejects longer windows; with
+    min_count=1 a window past the start is the same as one covering the whole series)."""
+    return min(window, len(values))
+
+
+def _trailing_sums(values: np.ndarray, window: int):
+    """Per-bar (count, sum) of the non-NaN values in each trailing window, plus the shift applied.
+
+    One cumulative sum serves every window length. Values are shifted by the
+    first finite value before summing to limit cancellation on long series.
+    """
+    finite = ~np.isnan(values)
+    shift = values[finite][0] if finite.any() else 0.0
+    lo = np.maximum(np.arange(1, len(values) + 1) - window, 0)
+    counts = np.concatenate(([0], np.cumsum(finite, dtype=np.int64)))
+    sums = np.concatenate(([0.0], np.cumsum(np.where(finite, values - shift, 0.0))))
+    return counts[1:] - counts[lo], sums[1:] - sums[lo], shift
+
+
+def _rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing mean over `window` bars with min_periods=1 semantics."""
+    if len(values) == 0:
+        return np.empty(0)
+    if bn is not None:
+        return bn.move_mean(values, window=_bn_window(values, window), min_count=1)
+    counts, sums, shift = _trailing_sums(values, window)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / counts + shift, np.nan)
+
+
+def _rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sample standard deviation (ddof=1) with min_periods=1 semantics."""
+    if len(values) == 0:
+        return np.empty(0)
+    if bn is not None:
+        return bn.move_std(values, window=_bn_window(values, window), min_count=1, ddof=1)
+    # Not via cumulative sums of squares: on low-volatility stretches the
+    # differences of large prefix sums lose most of their significant digits
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanstd(_trailing_windows(values, window), axis=-1, ddof=1)
+
+
+def _rolling_median(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing median over `window` bars, ignoring NaNs, with min_periods=1 semantics."""
+    if len(values) == 0:
+        return np.empty(0)
+    if bn is not None:
+        return bn.move_median(values, window=_bn_window(values, window), min_count=1)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return np.nanmedian(_trailing_windows(values, window), axis=-1)
+
+
+def _cached_rolling(fn: Callable[[np.ndarray, int], np.ndarray], values: np.ndarray, window: int) -> np.ndarray:
+    """fn(values, window), memoized on a digest of the input so repeated specs reuse it."""
+    key = (fn.__name__, window, len(values), hashlib.blake2b(values.tobytes(), digest_size=16).digest())
+    with _rolling_cache_lock:
+        result = _rolling_cache.get(key)
+        if result is not None:
+            _rolling_cache.move_to_end(key)
+            return result
+
+    result = fn(values, window)
+    result.flags.writeable = False  # shared between frames; never mutate in place
+    with _rolling_cache_lock:
+        _rolling_cache[key] = result
+        if len(_rolling_cache) > ROLLING_CACHE_SIZE:
+            _rolling_cache.popitem(last=False)
+    return result
+
+
+def _rolling_rv(returns: np.ndarray, window: int) -> np.ndarray:
+    """Annualized realized volatility over a trailing window."""
+    return _rolling_std(returns, window) * np.sqrt(252.0)
+
+
+def _series_array(df: pd.DataFrame, col: str) -> np.ndarray:
+    """Column as a 1-D float64 array (first column if yfinance left it 2-D)."""
+    values = df[col].to_numpy(dtype=np.float64)
+    if values.ndim > 1:
+        values = values[:, 0]
+    return values
 
 
 def add_features(df: pd.DataFrame, spec: StrategySpec) -> pd.DataFrame:
     """Add all indicators required by the spec (MAs, realized vol, etc.)."""
-    df = df.copy()
+    df = df.copy(deep=False)  # existing columns are only read; new ones land on the copy
 
     # Moving averages
-    for w in _required_ma_windows(spec):
+    close = _series_array(df, "close")
+    for w in spec.required_ma_windows:
         col = f"ma_{w}"
         if col not in df.columns:
-            df[col] = df["close"].rolling(window=w, min_periods=1).mean()
+            df[col] = _cached_rolling(_rolling_mean, close, w)
 
     # Realized volatility + 1-year median based on trailing 252 trading days
-    for w in _required_vol_windows(spec):
+    returns = _series_array(df, "return")
+    for w in spec.required_vol_windows:
         rv_col = f"rv_{w}"
         med_col = f"rv_{w}_med_252"
         if rv_col not in df.columns:
-            df[rv_col] = (
-                df["return"].rolling(window=w, min_periods=1).std() * np.sqrt(252.0)
-            )
+            df[rv_col] = _cached_rolling(_rolling_rv, returns, w)
         if med_col not in df.columns:
-            df[med_col] = df[rv_col].rolling(window=252, min_periods=1).median()
+            df[med_col] = _cached_rolling(_rolling_median, _series_array(df, rv_col), 252)
 
     return df
@@ -23,9 +23,10 @@ def compute_cagr(equity_curve: pd.Series, trading_days_per_year: int = 252) -> f
 def compute_max_drawdown(equity_curve: pd.Series) -> float:
     if equity_curve.empty:
         return 0.0
-    cum_max = equity_curve.cummax()
-    drawdowns = equity_curve / cum_max - 1.0
-    return float(drawdowns.min())
+    equity = equity_curve.to_numpy(dtype=np.float64)
+    # fmax/nanmin skip NaNs the same way Series.cummax()/min() do
+    drawdowns = equity / np.fmax.accumulate(equity) - 1.0
+    return float(np.nanmin(drawdowns))
 
 
 def compute_sharpe(daily_returns: pd.Series, trading_days_per_year: int = 252) -> float:
@@ -41,12 +42,12 @@ def compute_sharpe(daily_returns: pd.Series, trading_days_per_year: int = 252) -
 def compute_basic_metrics(df: pd.DataFrame) -> Dict[str, float]:
     equity = df["equity_curve"]
     strat_ret = df["strategy_return"]
+    position = df["position"].to_numpy(dtype=np.float64)
     metrics = {
         "cagr": compute_cagr(equity),
         "max_drawdown": compute_max_drawdown(equity),
         "sharpe": compute_sharpe(strat_ret),
-        "num_trades": float(
-            ((df["position"].diff().abs() > 0) & (df["position"] == 1)).sum()
-        ),
+        # Bars where the position flips into long (the first bar is never counted)
+        "num_trades": float(np.count_nonzero((position[1:] == 1.0) & (position[:-1] != 1.0))),
     }
     return metrics
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .backtester import run_backtest
+from .data import add_features, load_price_data
+from .metrics import compute_basic_metrics
+from .strategy_spec import StrategySpec
+
+# Worker pool size for run_many; 0/unset means one worker per CPU
+MAX_WORKERS = int(os.getenv("BACKTEST_MAX_WORKERS", "0")) or os.cpu_count() or 1
+
+PriceKey = Tuple[str, date, date]
+
+# Price frames handed to each worker process once, at pool start-up
+_worker_prices: Dict[PriceKey, pd.DataFrame] = {}
+
+
+def spec_hash(spec: StrategySpec) -> str:
+    """Stable identifier for a spec, independent of dict key order."""
+    return hashlib.sha1(spec.canonical_json.encode()).hexdigest()
+
+
+def _price_key(spec: StrategySpec) -> PriceKey:
+    return spec.ticker, spec.start_date, spec.end_date
+
+
+def _init_worker(prices: Dict[PriceKey, pd.DataFrame]) -> None:
+    global _worker_prices
+    _worker_prices = prices
+
+
+def _run_one(spec: StrategySpec) -> Tuple[str, Dict[str, float]]:
+    """Backtest a single spec against the pre-loaded prices and return its metrics."""
+    df = add_features(_worker_prices[_price_key(spec)], spec)
+    bt_df = run_backtest(df, spec)
+    return spec_hash(spec), compute_basic_metrics(bt_df)
+
+
+def run_many(
+    specs: List[StrategySpec],
+    prices: Optional[Dict[PriceKey, pd.DataFrame]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, Dict[str, float]]:
+    """Backtest many specs (parameter sweeps, multi-ticker runs) across processes.
+
+    Each backtest is path dependent, but independent specs are not, so they are
+    fanned out over a process pool. Prices are downloaded once per unique
+    (ticker, start, end) in the parent, unless already given in `prices`, and
+    shipped to each worker a single time through the pool initializer.
+
+    Returns a dict mapping spec_hash(spec) to that spec's metrics.
+    """
+    prices = dict(prices or {})
+    for spec in specs:
+        key = _price_key(spec)
+        if key not in prices:
+            prices[key] = load_price_data(spec)
+
+    workers = min(max_workers or MAX_WORKERS, len(specs))
+    if workers <= 1:
+        # Not worth a pool: run in-process
+        _init_worker(prices)
+        return dict(_run_one(spec) for spec in specs)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(prices,)) as pool:
+        return dict(pool.map(_run_one, specs, chunksize=max(1, len(specs) // (workers * 4))))
@@ -1,12 +1,27 @@
 from __future__ import annotations
 
-import matplotlib.pyplot as plt
 import pandas as pd
 
+# More points than this are strided down; a chart can't show them anyway
+MAX_PLOT_POINTS = 4000
+
 
 def plot_equity_curve(df: pd.DataFrame):
+    # Imported lazily: pyplot is slow to import and most callers never plot
+    import matplotlib.pyplot as plt
+
+    dates = df["date"].to_numpy()
+    equity = df["equity_curve"].to_numpy()
+    step = max(1, len(equity) // MAX_PLOT_POINTS)
+    if step > 1:
+        # Keep the final bar so the curve ends at the actual closing equity
+        keep = list(range(0, len(equity), step))
+        if keep[-1] != len(equity) - 1:
+            keep.append(len(equity) - 1)
+        dates, equity = dates[keep], equity[keep]
+
     fig, ax = plt.subplots()
-    ax.plot(df["date"], df["equity_curve"])
+    ax.plot(dates, equity, antialiased=False, linewidth=0.8)
     ax.set_xlabel("Date")
     ax.set_ylabel("Equity")
     ax.set_title("Equity Curve")
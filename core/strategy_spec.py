@@ -1,8 +1,11 @@
 from __future__ import annotations
 
+import copy
+import json
 from dataclasses import dataclass
 from datetime import date
-from typing import List, Literal, Union, Dict, Any
+from functools import cached_property
+from typing import FrozenSet, List, Literal, Tuple, Union, Dict, Any
 
 
 RuleType = Literal["crossover", "vol_filter"]
@@ -44,7 +47,55 @@ class StrategySpec:
     metrics: List[str]
     entry_sequential: bool = False  # If True, entry rules must trigger in order (first rule, then subsequent rules within their lookahead windows)
 
+    # Rules are not modified after parsing, so the type partitions and feature
+    # windows are computed once per spec
+    @cached_property
+    def crossover_rules(self) -> Tuple[CrossoverRule, ...]:
+        """Crossover rules among the entry and exit rules."""
+        return tuple(r for r in self.entry_rules + self.exit_rules if isinstance(r, CrossoverRule))
+
+    @cached_property
+    def vol_filter_rules(self) -> Tuple[VolFilterRule, ...]:
+        """Volatility filter rules among the entry and exit rules."""
+        return tuple(r for r in self.entry_rules + self.exit_rules if isinstance(r, VolFilterRule))
+
+    @cached_property
+    def entry_crossover_rules(self) -> Tuple[CrossoverRule, ...]:
+        return tuple(r for r in self.entry_rules if isinstance(r, CrossoverRule))
+
+    @cached_property
+    def entry_vol_filter_rules(self) -> Tuple[VolFilterRule, ...]:
+        return tuple(r for r in self.entry_rules if isinstance(r, VolFilterRule))
+
+    @cached_property
+    def required_ma_windows(self) -> FrozenSet[int]:
+        """Moving-average windows referenced by crossover rules."""
+        return frozenset(w for rule in self.crossover_rules for w in (rule.fast_ma, rule.slow_ma))
+
+    @cached_property
+    def required_vol_windows(self) -> FrozenSet[int]:
+        """Realized-volatility windows referenced by vol filter rules."""
+        return frozenset(rule.window for rule in self.vol_filter_rules)
+
     def to_dict(self) -> Dict[str, Any]:
+        """The spec as plain JSON-compatible data.
+
+        Returns a fresh copy each call, so callers may modify it.
+        """
+        return copy.deepcopy(self._dict)
+
+    @cached_property
+    def canonical_json(self) -> str:
+        """Compact, key-sorted JSON of the spec, for hashing and cache keys."""
+        return json.dumps(self._dict, sort_keys=True, separators=(",", ":"))
+
+    @cached_property
+    def display_json(self) -> str:
+        """Indented JSON of the spec, as shown to the user and the LLM."""
+        return json.dumps(self._dict, indent=2)
+
+    @cached_property
+    def _dict(self) -> Dict[str, Any]:
         def rule_to_dict(rule: Rule) -> Dict[str, Any]:
             base = {"type": rule.type}
             if rule.lookahead_days is not None:
@@ -1,12 +1,22 @@
 from __future__ import annotations
 
+import hashlib
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List
+from typing import Dict, List, Set, Tuple
 
 import pandas as pd
 
-from .strategy_spec import StrategySpec, CrossoverRule, VolFilterRule, Rule
-from .backtester import _evaluate_crossover, _evaluate_vol_filter, _evaluate_sequential_entry
+from .strategy_spec import StrategySpec
+from .backtester import _signal_presence
+
+
+# validate_spec is pure in the spec, which the pipeline never mutates after parsing,
+# so results are cached on a digest of its serialized form
+SPEC_CACHE_SIZE = 128
+_spec_cache: "OrderedDict[bytes, Tuple[bool, Tuple[str, ...], Tuple[str, ...]]]" = OrderedDict()
+_spec_cache_lock = threading.Lock()
 
 
 @dataclass
@@ -16,94 +26,94 @@ class ValidationResult:
     warnings: List[str]
 
 
+def _spec_key(spec: StrategySpec) -> bytes:
+    return hashlib.blake2b(spec.canonical_json.encode(), digest_size=16).digest()
+
+
 def validate_spec(spec: StrategySpec) -> ValidationResult:
+    """Static checks on a spec, memoized so pipeline resumes and replays skip the rule scan."""
+    key = _spec_key(spec)
+    with _spec_cache_lock:
+        cached = _spec_cache.get(key)
+        if cached is not None:
+            _spec_cache.move_to_end(key)
+    if cached is None:
+        result = _validate_spec(spec)
+        cached = (result.ok, tuple(result.errors), tuple(result.warnings))
+        with _spec_cache_lock:
+            _spec_cache[key] = cached
+            if len(_spec_cache) > SPEC_CACHE_SIZE:
+                _spec_cache.popitem(last=False)
+
+    # Fresh lists each call so callers can't mutate the cached entry
+    ok, errors, warnings = cached
+    return ValidationResult(ok=ok, errors=list(errors), warnings=list(warnings))
+
+
+def _validate_spec(spec: StrategySpec) -> ValidationResult:
     errors: List[str] = []
     warnings: List[str] = []
+    # Per-rule checks repeat the same message; keep only the first of each
+    seen_errors: Set[str] = set()
+    seen_warnings: Set[str] = set()
+
+    def add_error(msg: str) -> None:
+        if msg not in seen_errors:
+            seen_errors.add(msg)
+            errors.append(msg)
+
+    def add_warning(msg: str) -> None:
+        if msg not in seen_warnings:
+            seen_warnings.add(msg)
+            warnings.append(msg)
 
     if spec.start_date >= spec.end_date:
-        errors.append("Start date must be before end date.")
+        add_error("Start date must be before end date.")
 
     if not spec.entry_rules:
-        errors.append("At least one entry rule is required.")
+        add_error("At least one entry rule is required.")
     if not spec.exit_rules:
-        errors.append("At least one exit rule is required.")
+        add_error("At least one exit rule is required.")
 
     if not spec.metrics:
-        warnings.append("No metrics specified; default metrics will be used.")
-
-    crossover_entry = {}
-    vol_entry = {}
-
-    for rule in spec.entry_rules + spec.exit_rules:
-        if isinstance(rule, CrossoverRule):
-            if rule.fast_ma <= 0 or rule.slow_ma <= 0:
-                errors.append("Moving average windows must be positive integers.")
-            if rule.fast_ma == rule.slow_ma:
-                errors.append("Fast and slow moving averages must differ.")
-            if rule.fast_ma < 5 or rule.slow_ma < 5:
-                warnings.append("Very small moving average windows (under 5 days) may be unstable or overly reactive.")
-            if rule.fast_ma > 200 or rule.slow_ma > 200:
-                warnings.append("Very large moving average windows (over 200 days) may make the strategy slow and unresponsive.")
-
-            key = (rule.fast_ma, rule.slow_ma)
-            if key not in crossover_entry:
-                crossover_entry[key] = set()
-            if rule in spec.entry_rules:
-                crossover_entry[key].add(rule.direction)
-        elif isinstance(rule, VolFilterRule):
-            if rule.window <= 1:
-                errors.append("Volatility window must be greater than 1.")
-            if rule.window > 252 * 5:
-                warnings.append("Very large volatility windows may dilute signal responsiveness.")
-            key = (rule.window, rule.threshold)
-            if key not in vol_entry:
-                vol_entry[key] = set()
-            if rule in spec.entry_rules:
-                vol_entry[key].add(rule.relation)
+        add_warning("No metrics specified; default metrics will be used.")
+
+    for rule in spec.crossover_rules:
+        if rule.fast_ma <= 0 or rule.slow_ma <= 0:
+            add_error("Moving average windows must be positive integers.")
+        if rule.fast_ma == rule.slow_ma:
+            add_error("Fast and slow moving averages must differ.")
+        if rule.fast_ma < 5 or rule.slow_ma < 5:
+            add_warning("Very small moving average windows (under 5 days) may be unstable or overly reactive.")
+        if rule.fast_ma > 200 or rule.slow_ma > 200:
+            add_warning("Very large moving average windows (over 200 days) may make the strategy slow and unresponsive.")
+
+    for rule in spec.vol_filter_rules:
+        if rule.window <= 1:
+            add_error("Volatility window must be greater than 1.")
+        if rule.window > 252 * 5:
+            add_warning("Very large volatility windows may dilute signal responsiveness.")
+
+    crossover_entry: Dict[Tuple[int, int], Set[str]] = {}
+    for rule in spec.entry_crossover_rules:
+        crossover_entry.setdefault((rule.fast_ma, rule.slow_ma), set()).add(rule.direction)
+
+    vol_entry: Dict[Tuple[int, str], Set[str]] = {}
+    for rule in spec.entry_vol_filter_rules:
+        vol_entry.setdefault((rule.window, rule.threshold), set()).add(rule.relation)
 
     for key, directions in crossover_entry.items():
         if "above" in directions and "below" in directions:
-            errors.append("Entry rules require the same moving averages to be both above and below each other, which is impossible.")
+            add_error("Entry rules require the same moving averages to be both above and below each other, which is impossible.")
 
     for key, relations in vol_entry.items():
         if "above" in relations and "below" in relations:
-            errors.append("Entry rules require volatility to be both above and below the same threshold, which is impossible.")
+            add_error("Entry rules require volatility to be both above and below the same threshold, which is impossible.")
 
-    errors = list(dict.fromkeys(errors))
-    warnings = list(dict.fromkeys(warnings))
-
-    ok = len(errors) == 0
+    ok = not errors
     return ValidationResult(ok=ok, errors=errors, warnings=warnings)
 
 
-def _evaluate_entry_rules(spec: StrategySpec, row_idx: int, df: pd.DataFrame) -> bool:
-    if spec.entry_sequential:
-        return _evaluate_sequential_entry(spec.entry_rules, row_idx, df)
-    result = True
-    for rule in spec.entry_rules:
-        if isinstance(rule, CrossoverRule):
-            cond = _evaluate_crossover(rule, row_idx, df)
-        elif isinstance(rule, VolFilterRule):
-            cond = _evaluate_vol_filter(rule, row_idx, df)
-        else:
-            cond = False
-        result = result and cond
-        if not result:
-            return False
-    return result
-
-
-def _evaluate_exit_any(spec: StrategySpec, row_idx: int, df: pd.DataFrame) -> bool:
-    for rule in spec.exit_rules:
-        if isinstance(rule, CrossoverRule):
-            if _evaluate_crossover(rule, row_idx, df):
-                return True
-        elif isinstance(rule, VolFilterRule):
-            if _evaluate_vol_filter(rule, row_idx, df):
-                return True
-    return False
-
-
 def validate_with_data(spec: StrategySpec, df: pd.DataFrame) -> ValidationResult:
     errors: List[str] = []
     warnings: List[str] = []
@@ -118,11 +128,11 @@ def validate_with_data(spec: StrategySpec, df: pd.DataFrame) -> ValidationResult
     max_lookahead = 0
     max_duration = 0
 
+    for rule in spec.crossover_rules:
+        max_ma = max(max_ma, rule.fast_ma, rule.slow_ma)
+    for rule in spec.vol_filter_rules:
+        max_vol = max(max_vol, rule.window)
     for rule in spec.entry_rules + spec.exit_rules:
-        if isinstance(rule, CrossoverRule):
-            max_ma = max(max_ma, rule.fast_ma, rule.slow_ma)
-        elif isinstance(rule, VolFilterRule):
-            max_vol = max(max_vol, rule.window)
         if rule.lookahead_days is not None:
             max_lookahead = max(max_lookahead, rule.lookahead_days)
         if rule.duration_days is not None:
@@ -143,24 +153,13 @@ def validate_with_data(spec: StrategySpec, df: pd.DataFrame) -> ValidationResult
             f"Strategy uses long lookback windows (up to {required_len} days) but only {n} data points are available. Early signal values may be unreliable."
         )
 
-    any_entry = False
-    any_exit = False
-
-    for i in range(n):
-        if _evaluate_entry_rules(spec, i, df):
-            any_entry = True
-        if _evaluate_exit_any(spec, i, df):
-            any_exit = True
-        if any_entry and any_exit:
-            break
+    # Same per-bar signals the backtester trades on
+    any_entry, any_exit = _signal_presence(spec, df)
 
     if not any_entry:
         warnings.append("Given the historical data and rules, this strategy is unlikely to generate any entries. It may produce zero trades.")
     if any_entry and not any_exit:
         warnings.append("Entry conditions can occur, but exit conditions never trigger on this data. Positions may never close once opened.")
 
-    errors = list(dict.fromkeys(errors))
-    warnings = list(dict.fromkeys(warnings))
-
-    ok = len(errors) == 0
+    ok = not errors
     return ValidationResult(ok=ok, errors=errors, warnings=warnings)
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import hashlib
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+# LLM responses are cached on disk, one file per (task, exact request) digest;
+# requests are keyed by request_key (model, system instructions and prompt)
+LLM_CACHE_DIR = Path(os.getenv("LLM_CACHE_DIR", Path(__file__).parent.parent / ".llm_cache"))
+
+
+def request_key(model: str, system_message: Dict[str, str], prompt: str) -> str:
+    """Cache key for one chat request.
+
+    Includes a digest of the system instructions, so editing them invalidates
+    earlier responses instead of serving them stale.
+    """
+    system_digest = hashlib.sha256(system_message["content"].encode()).hexdigest()
+    return f"{model}\n{system_digest}\n{prompt}"
+
+
+def _cache_path(task: str, request: str) -> Path:
+    digest = hashlib.sha256(request.encode()).hexdigest()
+    return LLM_CACHE_DIR / task / f"{digest}.txt"
+
+
+def get_cached(task: str, request: str) -> Optional[str]:
+    """The stored response for an identical earlier request, if any."""
+    try:
+        return _cache_path(task, request).read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def put_cached(task: str, request: str, response: str) -> None:
+    """Store a response; caching is best-effort and never fails the call."""
+    path = _cache_path(task, request)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(response, encoding="utf-8")
+        os.replace(tmp_path, path)
+    except OSError:
+        pass  # cache dir not writable: just skip caching
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import httpx
+from dotenv import load_dotenv
+from openai import AsyncOpenAI, OpenAI
+
+try:
+    import h2  # noqa: F401
+except ImportError:  # h2 is optional; without it httpx speaks HTTP/1.1 only
+    HTTP2 = False
+else:
+    HTTP2 = True
+
+# Load environment variables from .env file
+env_path = Path(__file__).parent.parent / ".env"
+load_dotenv(env_path)
+
+# One client (and one keep-alive connection pool) shared by the translator,
+# interpreter and explainer, so back-to-back calls reuse open connections.
+# Expects OPENAI_API_KEY in env.
+client = OpenAI(
+    http_client=httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        http2=HTTP2,
+    )
+)
+
+# Async counterpart for the pipeline's async nodes. Its pool is bound to the
+# event loop that first uses it, so callers run on one long-lived loop.
+async_client = AsyncOpenAI(
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        http2=HTTP2,
+    )
+)
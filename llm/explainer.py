@@ -1,20 +1,13 @@
 from __future__ import annotations
 
 import time
-from pathlib import Path
 from typing import Dict
 
-from dotenv import load_dotenv
-from openai import OpenAI
-
 from core.strategy_spec import StrategySpec
 from utils.metrics_tracker import log_metrics
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(env_path)
-
-_client = OpenAI()
+from ._cache import get_cached, put_cached, request_key
+from ._client import async_client as _async_client, client as _client
 
 SYSTEM_INSTRUCTIONS = """
 You are a trading strategy performance explainer.
@@ -33,23 +26,35 @@ familiarity with investing. Mention:
 Do not include code or JSON in your answer. Use plain English.
 """
 
+# Built once so every request sends a byte-identical prefix for prompt caching
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_INSTRUCTIONS}
 
-def summarize_results(
-    spec: StrategySpec, metrics: Dict[str, float], model: str = "gpt-4o-mini"
-) -> str:
-    """Call the LLM to turn metrics into a human explanation."""
+
+def _explanation_prompt(spec: StrategySpec, metrics: Dict[str, float]) -> str:
     spec_dict = spec.to_dict()
     payload = {
         "strategy_spec": spec_dict,
         "metrics": metrics,
     }
 
-    input_text = (
+    return (
         "Here is the strategy spec and its performance metrics. "
         "Explain the results clearly but briefly.\n\n"
         f"{payload}"
     )
 
+
+def summarize_results(
+    spec: StrategySpec, metrics: Dict[str, float], model: str = "gpt-4o-mini"
+) -> str:
+    """Call the LLM to turn metrics into a human explanation."""
+    input_text = _explanation_prompt(spec, metrics)
+
+    cache_key = request_key(model, _SYSTEM_MESSAGE, input_text)
+    cached = get_cached("explanation", cache_key)
+    if cached is not None:
+        return cached
+
     start_time = time.time()
     success = False
     error_msg = None
@@ -58,7 +63,56 @@ def summarize_results(
         response = _client.chat.completions.create(
             model=model,
             messages=[
-                {"role": "system", "content": SYSTEM_INSTRUCTIONS},
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": input_text},
+            ],
+        )
+
+        input_tokens = response.usage.prompt_tokens
+        output_tokens = response.usage.completion_tokens
+        result = response.choices[0].message.content
+        if result is not None:
+            put_cached("explanation", cache_key, result)
+        success = True
+        return result
+    except Exception as e:
+        error_msg = str(e)
+        input_tokens = 0
+        output_tokens = 0
+        raise
+    finally:
+        latency = time.time() - start_time
+        log_metrics(
+            task_type="explanation",
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_seconds=latency,
+            success=success,
+            error_message=error_msg,
+        )
+
+
+async def asummarize_results(
+    spec: StrategySpec, metrics: Dict[str, float], model: str = "gpt-4o-mini"
+) -> str:
+    """Async summarize_results, for the pipeline's async nodes."""
+    input_text = _explanation_prompt(spec, metrics)
+
+    cache_key = request_key(model, _SYSTEM_MESSAGE, input_text)
+    cached = get_cached("explanation", cache_key)
+    if cached is not None:
+        return cached
+
+    start_time = time.time()
+    success = False
+    error_msg = None
+    
+    try:
+        response = await _async_client.chat.completions.create(
+            model=model,
+            messages=[
+                _SYSTEM_MESSAGE,
                 {"role": "user", "content": input_text},
             ],
         )
@@ -66,6 +120,8 @@ def summarize_results(
         input_tokens = response.usage.prompt_tokens
         output_tokens = response.usage.completion_tokens
         result = response.choices[0].message.content
+        if result is not None:
+            put_cached("explanation", cache_key, result)
         success = True
         return result
     except Exception as e:
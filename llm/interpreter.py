@@ -1,22 +1,12 @@
 from __future__ import annotations
 
-import json
 import time
-from pathlib import Path
 from typing import Dict, Any
 
-from dotenv import load_dotenv
-from openai import OpenAI
-
 from core.strategy_spec import StrategySpec
 from utils.metrics_tracker import log_metrics
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(env_path)
-
-# Initialize a single shared client (expects OPENAI_API_KEY in env)
-_client = OpenAI()
+from ._client import async_client as _async_client, client as _client
 
 SYSTEM_INSTRUCTIONS = """
 You are a trading strategy interpretation explainer. Your job is to explain how a natural language strategy description was interpreted into a structured trading strategy specification.
@@ -38,13 +28,12 @@ CRITICAL RULES:
 Be friendly and clear. Use plain English, avoid jargon.
 """
 
+# Built once so every request sends a byte-identical prefix for prompt caching
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_INSTRUCTIONS}
 
-def explain_interpretation(
-    user_text: str, spec: StrategySpec, model: str = "gpt-4o-mini"
-) -> str:
-    """Generate an explanation of how the user's strategy was interpreted."""
-    spec_dict = spec.to_dict()
-    spec_json = json.dumps(spec_dict, indent=2)
+
+def _interpretation_prompt(user_text: str, spec: StrategySpec) -> str:
+    spec_json = spec.display_json
     
     prompt = f"""Original user description:
 
@@ -67,6 +56,14 @@ Provide a clear, concise explanation with these sections:
    - If there are no critical ambiguities, omit this section entirely
 
 Be brief and direct. If the strategy is clear and executable, focus on summarizing the interpretation."""
+    return prompt
+
+
+def explain_interpretation(
+    user_text: str, spec: StrategySpec, model: str = "gpt-4o-mini"
+) -> str:
+    """Generate an explanation of how the user's strategy was interpreted."""
+    prompt = _interpretation_prompt(user_text, spec)
 
     start_time = time.time()
     success = False
@@ -76,7 +73,7 @@ Be brief and direct. If the strategy is clear and executable, focus on summarizi
         response = _client.chat.completions.create(
             model=model,
             messages=[
-                {"role": "system", "content": SYSTEM_INSTRUCTIONS},
+                _SYSTEM_MESSAGE,
                 {"role": "user", "content": prompt},
             ],
         )
@@ -103,3 +100,44 @@ Be brief and direct. If the strategy is clear and executable, focus on summarizi
             error_message=error_msg,
         )
 
+
+async def aexplain_interpretation(
+    user_text: str, spec: StrategySpec, model: str = "gpt-4o-mini"
+) -> str:
+    """Async explain_interpretation, for the pipeline's async nodes."""
+    prompt = _interpretation_prompt(user_text, spec)
+
+    start_time = time.time()
+    success = False
+    error_msg = None
+    
+    try:
+        response = await _async_client.chat.completions.create(
+            model=model,
+            messages=[
+                _SYSTEM_MESSAGE,
+                {"role": "user", "content": prompt},
+            ],
+        )
+
+        input_tokens = response.usage.prompt_tokens
+        output_tokens = response.usage.completion_tokens
+        result = response.choices[0].message.content
+        success = True
+        return result
+    except Exception as e:
+        error_msg = str(e)
+        input_tokens = 0
+        output_tokens = 0
+        raise
+    finally:
+        latency = time.time() - start_time
+        log_metrics(
+            task_type="interpretation",
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_seconds=latency,
+            success=success,
+            error_message=error_msg,
+        )
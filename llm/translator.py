@@ -1,22 +1,27 @@
 from __future__ import annotations
 
 import json
+import re
 import time
-from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, TypeVar
 
-from dotenv import load_dotenv
-from openai import OpenAI
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib parser
+    orjson = None
+
+try:
+    import fastjsonschema
+except ImportError:  # fastjsonschema is optional; parse_strategy_spec still rejects bad specs
+    fastjsonschema = None
 
 from core.strategy_spec import parse_strategy_spec, StrategySpec
 from utils.metrics_tracker import log_metrics
 
-# Load environment variables from .env file
-env_path = Path(__file__).parent.parent / ".env"
-load_dotenv(env_path)
+from ._cache import get_cached, put_cached, request_key
+from ._client import async_client as _async_client, client as _client
 
-# Initialize a single shared client (expects OPENAI_API_KEY in env)
-_client = OpenAI()
+T = TypeVar("T")
 
 SYSTEM_INSTRUCTIONS = """
 You are a trading strategy specification generator.
@@ -118,10 +123,197 @@ You MUST output a single JSON object with no explanation or commentary.
 
 USER_TEMPLATE = 'User strategy description:\n\n"""{user_text}"""\n'
 
+# Translation plus the interpretation summary in a single request, so the pipeline
+# doesn't pay a second round-trip (and resend the description) for explain_interpretation
+COMBINED_INSTRUCTIONS = SYSTEM_INSTRUCTIONS + """
+OUTPUT FORMAT OVERRIDE:
+Instead of the bare specification, output a single JSON object with exactly two keys:
 
-def translate_to_spec(user_text: str, model: str = "gpt-4o-mini") -> StrategySpec:
+{
+  "spec": { ...the strategy specification described above... },
+  "interpretation": "..."
+}
+
+"interpretation" is a short Markdown explanation for the user, in plain English, with:
+1. **How I interpreted this strategy** - Summarize the key elements: ticker, date range, entry rules, exit rules, and metrics.
+2. **Critical ambiguities** - ONLY ambiguities that would make the backtest fail or produce incorrect results.
+   Do NOT ask about optional features (position sizing, stop-losses, order types, etc.) or standard defaults
+   (SMA type, close-to-close execution, etc.). If there are none, omit this section entirely.
+
+Be brief and friendly. Nothing may appear outside the JSON object.
+"""
+
+
+_ISO_DATE = r"^\d{4}-\d{2}-\d{2}$"
+
+# parse_strategy_spec coerces numeric fields with int(), so numbers and
+# integer strings ("10") are both accepted
+_INT_LIKE = {"anyOf": [{"type": "number"}, {"type": "string", "pattern": r"^\s*[+-]?\d+\s*$"}]}
+_OPTIONAL_INT_LIKE = {"anyOf": [*_INT_LIKE["anyOf"], {"type": "null"}]}
+
+_RULE_SCHEMA = {
+    "type": "object",
+    "required": ["type"],
+    "properties": {
+        "lookahead_days": _OPTIONAL_INT_LIKE,
+        "duration_days": _OPTIONAL_INT_LIKE,
+    },
+    "oneOf": [
+        {
+            "properties": {
+                "type": {"const": "crossover"},
+                "fast_ma": _INT_LIKE,
+                "slow_ma": _INT_LIKE,
+            },
+            "required": ["fast_ma", "slow_ma", "direction"],
+        },
+        {
+            "properties": {
+                "type": {"const": "vol_filter"},
+                "window": _INT_LIKE,
+            },
+            "required": ["window"],
+        },
+    ],
+}
+
+SPEC_SCHEMA = {
+    "type": "object",
+    "required": ["ticker", "start_date", "end_date", "entry_rules", "exit_rules"],
+    "properties": {
+        "ticker": {"type": "string", "minLength": 1},
+        "start_date": {"type": "string", "pattern": _ISO_DATE},
+        "end_date": {"type": "string", "pattern": _ISO_DATE},
+        "entry_rules": {"type": "array", "minItems": 1, "items": _RULE_SCHEMA},
+        "exit_rules": {"type": "array", "minItems": 1, "items": _RULE_SCHEMA},
+        "entry_sequential": {"type": "boolean"},
+        "metrics": {"type": "array", "items": {"type": "string"}},
+    },
+}
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+# Compiled once into a specialized validator function
+_validate_spec_data = fastjsonschema.compile(SPEC_SCHEMA) if fastjsonschema is not None else None
+
+
+# A date field whose string value has fully arrived in the (possibly partial) JSON buffer
+_DATE_FIELD_RE = re.compile(r'"(start_date|end_date)"\s*:\s*"([^"]*)"')
+
+# Characters of already-scanned text kept in front of each new chunk, so a
+# date field split across chunks is still matched. Longer (malformed) fields
+# are left to the full parse, which checks both dates again.
+_DATE_SCAN_OVERLAP = 64
+
+
+def _check_date(field: str, value: str) -> None:
+    """Reject missing or placeholder dates the model copies from the schema."""
+    if not value or value == "YYYY-MM-DD" or "YYYY" in value.upper():
+        raise ValueError(
+            f"LLM generated invalid {field}. Your prompt is missing dates. "
+            "Please include explicit dates in your strategy description, for example: "
+            "'Backtest AAPL from 2020-01-01 to 2024-01-01'"
+        )
+
+
+# Built once so every request sends a byte-identical prefix, which OpenAI's
+# automatic prompt caching can reuse across calls
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_INSTRUCTIONS}
+_COMBINED_SYSTEM_MESSAGE = {"role": "system", "content": COMBINED_INSTRUCTIONS}
+
+
+def _spec_from_data(data: Dict[str, Any]) -> StrategySpec:
+    """Parse the model's spec object into a StrategySpec, rejecting placeholder dates."""
+    # Validate dates before parsing - catch placeholder text
+    _check_date("start_date", data.get("start_date", ""))
+    _check_date("end_date", data.get("end_date", ""))
+
+    if _validate_spec_data is not None:
+        try:
+            _validate_spec_data(data)
+        except fastjsonschema.JsonSchemaException as e:
+            raise ValueError(f"LLM generated an invalid strategy specification: {e.message}")
+
+    return parse_strategy_spec(data)
+
+
+def _spec_from_json(json_str: str) -> StrategySpec:
+    return _spec_from_data(_json_loads(json_str))
+
+
+def _spec_and_interpretation_from_json(json_str: str) -> Tuple[StrategySpec, Optional[str]]:
+    data: Dict[str, Any] = _json_loads(json_str)
+    interpretation = data.get("interpretation")
+    if not isinstance(interpretation, str) or not interpretation.strip():
+        interpretation = None
+    return _spec_from_data(data.get("spec", data)), interpretation
+
+
+class _StreamCollector:
+    """Accumulates streamed completion chunks into (content, input_tokens, output_tokens).
+
+    Dates are checked as soon as their values arrive, so a placeholder date
+    aborts the request instead of waiting for (and paying for) the rest.
+    """
+
+    def __init__(self) -> None:
+        self.parts: List[str] = []
+        self.checked: Set[str] = set()
+        self.tail = ""  # end of the scanned text, see _DATE_SCAN_OVERLAP
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def feed(self, chunk) -> None:
+        if chunk.usage is not None:
+            self.input_tokens = chunk.usage.prompt_tokens
+            self.output_tokens = chunk.usage.completion_tokens
+        if not chunk.choices or not chunk.choices[0].delta.content:
+            return
+        content = chunk.choices[0].delta.content
+        self.parts.append(content)
+        if len(self.checked) < 2:
+            # Scan only the new text plus the overlap, not the whole response
+            window = self.tail + content
+            self.tail = window[-_DATE_SCAN_OVERLAP:]
+            for match in _DATE_FIELD_RE.finditer(window):
+                if match.group(1) not in self.checked:
+                    self.checked.add(match.group(1))
+                    _check_date(match.group(1), match.group(2))
+
+    def result(self) -> Tuple[str, int, int]:
+        return "".join(self.parts), self.input_tokens, self.output_tokens
+
+
+def _read_stream(stream) -> Tuple[str, int, int]:
+    """Collect a streamed completion, returning (content, input_tokens, output_tokens)."""
+    collector = _StreamCollector()
+    with stream:
+        for chunk in stream:
+            collector.feed(chunk)
+    return collector.result()
+
+
+async def _aread_stream(stream) -> Tuple[str, int, int]:
+    """Async _read_stream."""
+    collector = _StreamCollector()
+    async with stream:
+        async for chunk in stream:
+            collector.feed(chunk)
+    return collector.result()
+
+
+def _translate(
+    user_text: str, model: str, system_message: Dict[str, str], cache_task: str, parse: Callable[[str], T]
+) -> T:
+    """Run one streamed JSON completion for user_text and parse it, with caching and metrics."""
     prompt = USER_TEMPLATE.format(user_text=user_text)
-    
+
+    # Replays and resumes re-translate the same text; only successful outputs are cached
+    cache_key = request_key(model, system_message, prompt)
+    cached = get_cached(cache_task, cache_key)
+    if cached is not None:
+        return parse(cached)
+
     start_time = time.time()
     success = False
     error_msg = None
@@ -130,40 +322,70 @@ def translate_to_spec(user_text: str, model: str = "gpt-4o-mini") -> StrategySpe
         response = _client.chat.completions.create(
             model=model,
             messages=[
-                {"role": "system", "content": SYSTEM_INSTRUCTIONS},
+                system_message,
                 {"role": "user", "content": prompt},
             ],
             response_format={"type": "json_object"},
+            stream=True,
+            stream_options={"include_usage": True},
         )
-
-        # Extract token usage
-        input_tokens = response.usage.prompt_tokens
-        output_tokens = response.usage.completion_tokens
-        
-        json_str = response.choices[0].message.content
-        data: Dict[str, Any] = json.loads(json_str)
-        
-        # Validate dates before parsing - catch placeholder text
-        start_date_str = data.get("start_date", "")
-        end_date_str = data.get("end_date", "")
-        
-        if not start_date_str or start_date_str == "YYYY-MM-DD" or "YYYY" in start_date_str.upper():
-            raise ValueError(
-                "LLM generated invalid start_date. Your prompt is missing dates. "
-                "Please include explicit dates in your strategy description, for example: "
-                "'Backtest AAPL from 2020-01-01 to 2024-01-01'"
-            )
-        if not end_date_str or end_date_str == "YYYY-MM-DD" or "YYYY" in end_date_str.upper():
-            raise ValueError(
-                "LLM generated invalid end_date. Your prompt is missing dates. "
-                "Please include explicit dates in your strategy description, for example: "
-                "'Backtest AAPL from 2020-01-01 to 2024-01-01'"
-            )
+        json_str, input_tokens, output_tokens = _read_stream(response)
+        result = parse(json_str)
+        put_cached(cache_task, cache_key, json_str)
+        success = True
         
-        spec = parse_strategy_spec(data)
+        return result
+    except Exception as e:
+        error_msg = str(e)
+        input_tokens = 0
+        output_tokens = 0
+        raise
+    finally:
+        latency = time.time() - start_time
+        log_metrics(
+            task_type="translation",
+            model=model,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            latency_seconds=latency,
+            success=success,
+            error_message=error_msg,
+        )
+
+
+async def _atranslate(
+    user_text: str, model: str, system_message: Dict[str, str], cache_task: str, parse: Callable[[str], T]
+) -> T:
+    """Async _translate, on the shared async client."""
+    prompt = USER_TEMPLATE.format(user_text=user_text)
+
+    # Replays and resumes re-translate the same text; only successful outputs are cached
+    cache_key = request_key(model, system_message, prompt)
+    cached = get_cached(cache_task, cache_key)
+    if cached is not None:
+        return parse(cached)
+
+    start_time = time.time()
+    success = False
+    error_msg = None
+    
+    try:
+        response = await _async_client.chat.completions.create(
+            model=model,
+            messages=[
+                system_message,
+                {"role": "user", "content": prompt},
+            ],
+            response_format={"type": "json_object"},
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        json_str, input_tokens, output_tokens = await _aread_stream(response)
+        result = parse(json_str)
+        put_cached(cache_task, cache_key, json_str)
         success = True
         
-        return spec
+        return result
     except Exception as e:
         error_msg = str(e)
         input_tokens = 0
@@ -180,3 +402,33 @@ def translate_to_spec(user_text: str, model: str = "gpt-4o-mini") -> StrategySpe
             success=success,
             error_message=error_msg,
         )
+
+
+def translate_to_spec(user_text: str, model: str = "gpt-4o-mini") -> StrategySpec:
+    return _translate(user_text, model, _SYSTEM_MESSAGE, "translation", _spec_from_json)
+
+
+async def atranslate_to_spec(user_text: str, model: str = "gpt-4o-mini") -> StrategySpec:
+    return await _atranslate(user_text, model, _SYSTEM_MESSAGE, "translation", _spec_from_json)
+
+
+def translate_with_interpretation(
+    user_text: str, model: str = "gpt-4o-mini"
+) -> Tuple[StrategySpec, Optional[str]]:
+    """Translate user_text and explain the interpretation in one LLM call.
+
+    The interpretation is None if the model left it out; callers can fall back
+    to explain_interpretation.
+    """
+    return _translate(
+        user_text, model, _COMBINED_SYSTEM_MESSAGE, "translation_interpretation", _spec_and_interpretation_from_json
+    )
+
+
+async def atranslate_with_interpretation(
+    user_text: str, model: str = "gpt-4o-mini"
+) -> Tuple[StrategySpec, Optional[str]]:
+    """Async translate_with_interpretation, for the pipeline's async nodes."""
+    return await _atranslate(
+        user_text, model, _COMBINED_SYSTEM_MESSAGE, "translation_interpretation", _spec_and_interpretation_from_json
+    )
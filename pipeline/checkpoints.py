@@ -1,16 +1,197 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Literal
+import os
+import pickle
+import sqlite3
+import struct
+import threading
+from collections import OrderedDict
+from typing import Any, List, Literal, Tuple
 
+import pandas as pd
+import pyarrow as pa
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.types import Command
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # langgraph-checkpoint-sqlite is optional
+    SqliteSaver = None
 
 from pipeline.state import PipelineState
 
 logger = logging.getLogger(__name__)
 
+# Path of a SQLite database to persist checkpoints in; unset keeps them in memory
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB")
+
+# In-memory checkpoints are kept for at most this many sessions (threads)
+MAX_CHECKPOINT_THREADS = int(os.getenv("MAX_CHECKPOINT_THREADS", "256"))
+
+# When runs write checkpoints. "exit" saves only where a run stops - the
+# confirmation interrupt before validate, the end of the pipeline, or an
+# error - which is all a resume reads, instead of the full state after every
+# node. "async"/"sync" restore per-step checkpoints.
+CHECKPOINT_DURABILITY = os.getenv("CHECKPOINT_DURABILITY", "exit")
+
 # Shared checkpointer instance - singleton pattern
-_shared_checkpointer: MemorySaver | None = None
+_shared_checkpointer: BaseCheckpointSaver | None = None
+
+
+def _frame_to_ipc(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _frame_from_ipc(payload: bytes) -> pd.DataFrame:
+    return pa.ipc.open_stream(payload).read_all().to_pandas()
+
+
+def _pickle_frame(df: pd.DataFrame) -> bytes:
+    """Pickle protocol 5 with the frame's array buffers out-of-band.
+
+    The numeric blocks are referenced rather than copied into the pickle
+    stream. The payload is a part count followed by length-prefixed parts:
+    the pickle header first, then each out-of-band buffer.
+    """
+    buffers: List[memoryview] = []
+
+    def out_of_band(buf: pickle.PickleBuffer) -> bool:
+        try:
+            buffers.append(buf.raw())
+        except BufferError:
+            return True  # non-contiguous: keep it in-band
+        return False
+
+    header = pickle.dumps(df, protocol=5, buffer_callback=out_of_band)
+    out = bytearray(struct.pack("<I", len(buffers) + 1))
+    for part in (memoryview(header), *buffers):
+        out += struct.pack("<Q", part.nbytes)
+        out += part
+    return bytes(out)
+
+
+def _unpickle_frame(payload: bytes) -> pd.DataFrame:
+    view = memoryview(payload)
+    (count,) = struct.unpack_from("<I", view, 0)
+    offset = 4
+    parts = []
+    for _ in range(count):
+        (size,) = struct.unpack_from("<Q", view, offset)
+        offset += 8
+        parts.append(view[offset:offset + size])
+        offset += size
+    return pickle.loads(parts[0], buffers=parts[1:])
+
+
+# Project classes stored in PipelineState, as (module, name). JsonPlusSerializer
+# only deserializes msgpack-encoded classes that are registered.
+CHECKPOINT_TYPES = (
+    ("core.strategy_spec", "StrategySpec"),
+    ("core.strategy_spec", "CrossoverRule"),
+    ("core.strategy_spec", "VolFilterRule"),
+    ("core.validator", "ValidationResult"),
+    ("core.backtester", "Trade"),
+)
+
+
+class FrameSerializer(JsonPlusSerializer):
+    """Checkpoint serializer that also handles pandas DataFrames.
+
+    Frames are written as Arrow IPC streams, so price data and backtest
+    results survive checkpointing instead of being recomputed on resume.
+    Frames Arrow can't represent (e.g. columns of Python objects) are pickled
+    with protocol 5 out-of-band buffers.
+    Everything else goes through the default JsonPlusSerializer, with the
+    CHECKPOINT_TYPES classes allowed unless the caller passes its own list.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        kwargs.setdefault("allowed_msgpack_modules", CHECKPOINT_TYPES)
+        super().__init__(**kwargs)
+
+    def dumps_typed(self, obj: Any) -> Tuple[str, bytes]:
+        if isinstance(obj, pd.DataFrame):
+            try:
+                return "arrow_ipc", _frame_to_ipc(obj)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                return "pickle5_frame", _pickle_frame(obj)
+        return super().dumps_typed(obj)
+
+    def loads_typed(self, data: Tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if type_ == "arrow_ipc":
+            return _frame_from_ipc(payload)
+        if type_ == "pickle5_frame":
+            return _unpickle_frame(payload)
+        return super().loads_typed(data)
+
+
+class BoundedMemorySaver(MemorySaver):
+    """MemorySaver that forgets the least recently written sessions beyond max_threads."""
+
+    def __init__(self, max_threads: int = MAX_CHECKPOINT_THREADS) -> None:
+        super().__init__(serde=FrameSerializer())
+        self.max_threads = max_threads
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+        self._recent_lock = threading.Lock()
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        result = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = config["configurable"]["thread_id"]
+        with self._recent_lock:
+            self._recent[thread_id] = None
+            self._recent.move_to_end(thread_id)
+            evicted = []
+            while len(self._recent) > self.max_threads:
+                evicted.append(self._recent.popitem(last=False)[0])
+        for old_thread_id in evicted:
+            self.delete_thread(old_thread_id)
+        return result
+
+
+if SqliteSaver is not None:
+    class ThreadedSqliteSaver(SqliteSaver):
+        """SqliteSaver usable from the async graph API (ainvoke/astream).
+        
+        SqliteSaver only implements the sync methods; here each async method
+        runs its sync counterpart in a worker thread, which the shared
+        connection (check_same_thread=False) and SqliteSaver's lock allow.
+        """
+        
+        async def aget_tuple(self, config):
+            return await asyncio.to_thread(self.get_tuple, config)
+        
+        async def alist(self, config, *, filter=None, before=None, limit=None):
+            items = await asyncio.to_thread(
+                lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+            )
+            for item in items:
+                yield item
+        
+        async def aput(self, config, checkpoint, metadata, new_versions):
+            return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+        
+        async def aput_writes(self, *args, **kwargs):
+            return await asyncio.to_thread(self.put_writes, *args, **kwargs)
+        
+        async def adelete_thread(self, thread_id):
+            return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def _sqlite_checkpointer(path: str) -> BaseCheckpointSaver:
+    # Shared across Streamlit's script threads; WAL lets reads proceed during writes
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return ThreadedSqliteSaver(conn, serde=FrameSerializer())
 
 
 def create_checkpointer():
@@ -18,14 +199,22 @@ def create_checkpointer():
     
     Uses a singleton pattern to ensure all graph instances share the same
     checkpointer, so state persists across different graph instances.
+    Checkpoints go to SQLite when CHECKPOINT_DB is set (and the sqlite
+    checkpointer is installed), otherwise to a size-bounded in-memory saver.
     
     Returns:
-        Shared MemorySaver instance for checkpointing
+        Shared checkpointer instance
     """
     global _shared_checkpointer
     if _shared_checkpointer is None:
-        _shared_checkpointer = MemorySaver()
-        logger.info("Created shared checkpointer instance")
+        if CHECKPOINT_DB and SqliteSaver is not None:
+            _shared_checkpointer = _sqlite_checkpointer(CHECKPOINT_DB)
+            logger.info("Created shared SQLite checkpointer at %s", CHECKPOINT_DB)
+        else:
+            if CHECKPOINT_DB:
+                logger.warning("CHECKPOINT_DB is set but langgraph-checkpoint-sqlite is not installed; using memory")
+            _shared_checkpointer = BoundedMemorySaver()
+            logger.info("Created shared checkpointer instance")
     return _shared_checkpointer
 
 
@@ -61,11 +250,11 @@ def get_checkpoint_state(graph, thread_id: str):
         state = graph.get_state(config)
         return state.values if state else None
     except Exception as e:
-        logger.error(f"Error getting checkpoint state: {e}")
+        logger.error("Error getting checkpoint state: %s", e)
         return None
 
 
-def resume_from_checkpoint(graph, thread_id: str, confirmed: bool = True):
+async def aresume_from_checkpoint(graph, thread_id: str, confirmed: bool = True):
     """Resume pipeline execution from checkpoint after user confirmation.
     
     Args:
@@ -79,19 +268,14 @@ def resume_from_checkpoint(graph, thread_id: str, confirmed: bool = True):
     config = {"configurable": {"thread_id": thread_id}}
     
     if confirmed:
-        # Update state to mark as confirmed
-        current_state = graph.get_state(config)
-        if current_state:
-            current_state.values["confirmed"] = True
-            graph.update_state(config, current_state.values)
-        
-        # Resume execution
-        result = graph.invoke(None, config)
-        return result
+        # Write confirmed and resume from the checkpoint in one transition
+        return await graph.ainvoke(
+            Command(update={"confirmed": True}, resume=True), config, durability=CHECKPOINT_DURABILITY
+        )
     else:
         # User wants to reset - would need to restart from translate
         # For now, just return current state
-        current_state = graph.get_state(config)
+        current_state = await graph.aget_state(config)
         return current_state.values if current_state else None
 
 
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import random
 import time
 from functools import wraps
 from typing import Callable, TypeVar, ParamSpec
@@ -16,23 +18,71 @@ def retry_with_backoff(
     initial_delay: float = 1.0,
     backoff_factor: float = 2.0,
     retryable_exceptions: tuple[type[Exception], ...] = (Exception,),
+    max_delay: float = 30.0,
+    retry_after: Callable[[Exception], float | None] | None = None,
 ):
-    """Decorator to retry a function with exponential backoff.
+    """Decorator to retry a function with jittered exponential backoff.
+    
+    Delays follow the "decorrelated jitter" scheme: each one is drawn uniformly
+    between initial_delay and backoff_factor times the previous delay, capped at
+    max_delay, so concurrent callers hitting the same rate limit spread out.
+    Coroutine functions get an async wrapper that awaits asyncio.sleep instead
+    of blocking the event loop.
     
     Args:
         max_retries: Maximum number of retry attempts (default: 3)
         initial_delay: Initial delay in seconds before first retry (default: 1.0)
         backoff_factor: Multiplier for delay after each retry (default: 2.0)
         retryable_exceptions: Tuple of exception types to retry on
+        max_delay: Upper bound on any single delay in seconds (default: 30.0)
+        retry_after: Optional function returning a server-requested wait for an
+            exception (or None); when it gives one, that wait is used instead
     
     Returns:
         Decorated function with retry logic
     """
+    def next_delay(delay: float) -> float:
+        return min(max_delay, random.uniform(initial_delay, delay * backoff_factor))
+    
+    def wait_for(e: Exception, delay: float) -> float:
+        hint = retry_after(e) if retry_after is not None else None
+        return delay if hint is None else min(max_delay, hint)
+    
     def decorator(func: Callable[P, T]) -> Callable[P, T]:
+        name = func.__name__
+        
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+                last_exception = None
+                delay = min(initial_delay, max_delay)
+                
+                for attempt in range(max_retries + 1):  # +1 for initial attempt
+                    try:
+                        return await func(*args, **kwargs)
+                    except retryable_exceptions as e:
+                        last_exception = e
+                        
+                        if attempt < max_retries:
+                            wait = wait_for(e, delay)
+                            logger.warning(
+                                "%s failed (attempt %d/%d): %s. Retrying in %.2f seconds...",
+                                name, attempt + 1, max_retries + 1, e, wait,
+                            )
+                            await asyncio.sleep(wait)
+                            delay = next_delay(delay)
+                        else:
+                            logger.error("%s failed after %d attempts: %s", name, max_retries + 1, e)
+                
+                # All retries exhausted, raise the last exception
+                raise last_exception
+            
+            return async_wrapper
+        
         @wraps(func)
         def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
             last_exception = None
-            delay = initial_delay
+            delay = min(initial_delay, max_delay)
             
             for attempt in range(max_retries + 1):  # +1 for initial attempt
                 try:
@@ -41,16 +91,15 @@ def retry_with_backoff(
                     last_exception = e
                     
                     if attempt < max_retries:
+                        wait = wait_for(e, delay)
                         logger.warning(
-                            f"{func.__name__} failed (attempt {attempt + 1}/{max_retries + 1}): {str(e)}. "
-                            f"Retrying in {delay:.2f} seconds..."
+                            "%s failed (attempt %d/%d): %s. Retrying in %.2f seconds...",
+                            name, attempt + 1, max_retries + 1, e, wait,
                         )
-                        time.sleep(delay)
-                        delay *= backoff_factor
+                        time.sleep(wait)
+                        delay = next_delay(delay)
                     else:
-                        logger.error(
-                            f"{func.__name__} failed after {max_retries + 1} attempts: {str(e)}"
-                        )
+                        logger.error("%s failed after %d attempts: %s", name, max_retries + 1, e)
             
             # All retries exhausted, raise the last exception
             raise last_exception
@@ -59,6 +108,23 @@ def retry_with_backoff(
     return decorator
 
 
+def _openai_retry_after(error: Exception) -> float | None:
+    """Wait requested by the server on a 429, from the Retry-After(-Ms) headers."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            continue  # HTTP-date form; fall back to the backoff schedule
+    return None
+
+
 def retry_on_api_error(max_retries: int = 3):
     """Specialized retry decorator for API calls (OpenAI, network, etc.).
     
@@ -71,9 +137,14 @@ def retry_on_api_error(max_retries: int = 3):
     - Authentication errors
     - Invalid request errors
     - Parsing errors
+    
+    Rate-limit retries wait as long as the server's Retry-After header asks.
     """
     from openai import RateLimitError, APIConnectionError, APITimeoutError, APIError
     
+    def retry_after(error: Exception) -> float | None:
+        return _openai_retry_after(error) if isinstance(error, RateLimitError) else None
+    
     retryable = (
         RateLimitError,
         APIConnectionError,
@@ -88,6 +159,7 @@ def retry_on_api_error(max_retries: int = 3):
         initial_delay=1.0,
         backoff_factor=2.0,
         retryable_exceptions=retryable,
+        retry_after=retry_after,
     )
 
 
@@ -120,38 +192,35 @@ def handle_node_error(
     is_critical: bool = True,
     retry_count_key: str | None = None
 ) -> dict:
-    """Handle errors in pipeline nodes with proper state updates.
+    """Handle errors in pipeline nodes, returning the state update to record them.
     
     Args:
         node_name: Name of the node that failed
-        state: Pipeline state dictionary
+        state: Pipeline state dictionary (read only)
         error: Exception that occurred
         is_critical: Whether this error should stop execution
         retry_count_key: Key to track retry count in state["retry_count"]
     
     Returns:
-        Updated state with error information
+        Partial state update with the error message (merged into state["errors"]
+        by its reducer) and the bumped retry count
     """
     error_msg = f"{node_name} failed: {str(error)}"
     logger.error(error_msg)
     
-    # Add to errors list
-    if "errors" not in state:
-        state["errors"] = []
-    state["errors"].append(error_msg)
+    update = {"errors": [error_msg]}
     
     # Track retry count if specified
     if retry_count_key:
-        if "retry_count" not in state:
-            state["retry_count"] = {}
-        state["retry_count"][retry_count_key] = state["retry_count"].get(retry_count_key, 0) + 1
+        retry_count = state.get("retry_count") or {}
+        update["retry_count"] = {retry_count_key: retry_count.get(retry_count_key, 0) + 1}
     
     # If critical, the exception should be re-raised by the caller
     # If non-critical, just log and continue
     if not is_critical:
-        logger.warning(f"Non-critical error in {node_name}, continuing...")
+        logger.warning("Non-critical error in %s, continuing...", node_name)
     
-    return state
+    return update
 
 
 # Quick validation when run directly: python pipeline/errors.py
@@ -178,10 +247,10 @@ if __name__ == "__main__":
     try:
         raise ValueError("Test error")
     except Exception as e:
-        state = handle_node_error("test_node", state, e, is_critical=False)
+        update = handle_node_error("test_node", state, e, is_critical=False)
     
-    assert len(state["errors"]) == 1
-    assert "test_node failed" in state["errors"][0]
+    assert len(update["errors"]) == 1
+    assert "test_node failed" in update["errors"][0]
     print("✓ Error handling works correctly")
     
     print("✓ All error handling utilities validated successfully!")
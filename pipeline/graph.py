@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Literal
+import threading
+from typing import Any, Dict, Literal
 
-import pandas as pd
 from langgraph.graph import StateGraph, END
+from langgraph.types import Command
 
-from pipeline.state import PipelineState
+from pipeline.state import PipelineState, append_unique
 from pipeline.nodes import (
     initialize_node,
     translate_node,
@@ -22,64 +24,69 @@ from pipeline.nodes import (
     aggregate_node,
     persist_node,
 )
-from pipeline.checkpoints import create_checkpointer, check_confirmation
+from pipeline.checkpoints import CHECKPOINT_DURABILITY, create_checkpointer, check_confirmation
 
 logger = logging.getLogger(__name__)
 
+# Compiled graphs shared by run_pipeline / get_pipeline_state / resume_pipeline,
+# keyed by interactive (the confirmation flow) vs auto-confirmed
+_compiled_graphs: Dict[bool, Any] = {}
+_graph_lock = threading.Lock()
+
+# Event loop the sync entry points run the async graph on. It lives in a daemon
+# thread for the whole process: the shared AsyncOpenAI connection pool binds to
+# the first loop that uses it, so every run must go through the same loop.
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+
 
 def check_validation(state: PipelineState) -> Literal["pass", "fail"]:
     """Conditional routing: check if validation passed."""
-    if state.get("validation_result") is None:
-        return "fail"
-    
-    validation_result = state["validation_result"]
-    if validation_result.ok and len(validation_result.errors) == 0:
-        return "pass"
-    return "fail"
+    # validate_spec / validate_with_data set ok exactly when there are no errors
+    result = state.get("validation_result")
+    return "pass" if result is not None and result.ok else "fail"
 
 
 def check_data_validation(state: PipelineState) -> Literal["pass", "fail"]:
     """Conditional routing: check if data validation passed."""
-    if state.get("data_validation_result") is None:
-        return "fail"
-    
-    validation_result = state["data_validation_result"]
-    if validation_result.ok and len(validation_result.errors) == 0:
-        return "pass"
-    return "fail"
+    # validate_spec / validate_with_data set ok exactly when there are no errors
+    result = state.get("data_validation_result")
+    return "pass" if result is not None and result.ok else "fail"
 
 
-def checkpoint_reducer(state: PipelineState) -> PipelineState:
-    """Reducer to prepare state for checkpointing.
+def create_pipeline(interactive: bool = True):
+    """Return the compiled LangGraph pipeline workflow.
     
-    Converts non-serializable objects (DataFrames) to None before checkpointing.
-    DataFrames will be regenerated when needed, or we can store them separately.
-    """
-    # Create a copy of state without DataFrames for checkpointing
-    checkpoint_state = dict(state)
+    Each variant is the same on every call and the checkpointer is shared, so
+    it is built once per process and reused.
     
-    # Convert DataFrames to None for checkpointing (they're not serializable)
-    if isinstance(checkpoint_state.get("data"), pd.DataFrame):
-        checkpoint_state["data"] = None
-    if isinstance(checkpoint_state.get("backtest_results"), pd.DataFrame):
-        checkpoint_state["backtest_results"] = None
-    
-    return checkpoint_state
-
-
-def create_pipeline():
-    """Create and compile the LangGraph pipeline workflow.
+    Args:
+        interactive: True for the human-in-the-loop graph that pauses for
+            confirmation before validate; False for the auto-confirmed graph
+            without the interpret step or the pause
     
     Returns:
         Compiled StateGraph ready for execution
     """
+    graph = _compiled_graphs.get(interactive)
+    if graph is None:
+        with _graph_lock:
+            graph = _compiled_graphs.get(interactive)
+            if graph is None:
+                graph = _compiled_graphs[interactive] = _build_pipeline(interactive)
+    return graph
+
+
+def _build_pipeline(interactive: bool = True):
+    """Create and compile the LangGraph pipeline workflow."""
     # Create the graph
     workflow = StateGraph(PipelineState)
     
     # Add all nodes
     workflow.add_node("initialize", initialize_node)
     workflow.add_node("translate", translate_node)
-    workflow.add_node("interpret", interpret_node)
+    if interactive:
+        workflow.add_node("interpret", interpret_node)
     workflow.add_node("validate", validate_node)
     workflow.add_node("fetch_data", fetch_data_node)
     workflow.add_node("add_features", add_features_node)
@@ -96,8 +103,12 @@ def create_pipeline():
     
     # Add sequential edges
     workflow.add_edge("initialize", "translate")
-    workflow.add_edge("translate", "interpret")
-    workflow.add_edge("interpret", "validate")
+    if interactive:
+        workflow.add_edge("translate", "interpret")
+        workflow.add_edge("interpret", "validate")
+    else:
+        # Already confirmed: nobody reads the interpretation before validate
+        workflow.add_edge("translate", "validate")
     
     # Note: interrupt_before=["validate"] will pause execution here
     # When resuming, execution continues to validate node
@@ -126,13 +137,12 @@ def create_pipeline():
         }
     )
     
-    # Continue sequential flow after data validation
+    # Fan out after the backtest: metrics -> explain and trades run as parallel
+    # branches, joined again before aggregate
     workflow.add_edge("backtest", "metrics")
-    
-    # Metrics and trades can run in parallel (but we'll do sequential for simplicity)
-    workflow.add_edge("metrics", "trades")
-    workflow.add_edge("trades", "explain")
-    workflow.add_edge("explain", "aggregate")
+    workflow.add_edge("backtest", "trades")
+    workflow.add_edge("metrics", "explain")
+    workflow.add_edge(["explain", "trades"], "aggregate")
     workflow.add_edge("aggregate", "persist")
     workflow.add_edge("persist", END)
     
@@ -140,23 +150,49 @@ def create_pipeline():
     # Interrupt before validate node to wait for user confirmation
     checkpointer = create_checkpointer()
     
-    # Note: We can't use a reducer directly in compile, but we'll handle
-    # DataFrame serialization by catching the error and continuing
-    # The state will still be returned, just not fully checkpointed after DataFrames are added
+    # The checkpointer's serializer stores DataFrames as Arrow IPC, so the full
+    # state (prices, backtest results) survives checkpointing; runs only write
+    # checkpoints where they stop (see CHECKPOINT_DURABILITY)
     graph = workflow.compile(
         checkpointer=checkpointer,
-        interrupt_before=["validate"]  # Pause here for user confirmation
+        interrupt_before=["validate"] if interactive else None  # Pause here for user confirmation
     )
     
-    logger.info("Pipeline graph created and compiled successfully with checkpointing")
+    logger.info("Pipeline graph (interactive=%s) created and compiled successfully with checkpointing", interactive)
     return graph
 
 
+def _get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="pipeline-loop", daemon=True).start()
+                _loop = loop
+    return _loop
+
+
+def _run_sync(coro):
+    """Run a coroutine on the shared pipeline loop and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+
 def run_pipeline(
     user_text: str,
     model: str = "gpt-4o-mini",
     session_id: str | None = None,
     confirmed: bool = False
+):
+    """Synchronous arun_pipeline, for callers without an event loop (the Streamlit app)."""
+    return _run_sync(arun_pipeline(user_text, model, session_id, confirmed))
+
+
+async def arun_pipeline(
+    user_text: str,
+    model: str = "gpt-4o-mini",
+    session_id: str | None = None,
+    confirmed: bool = False
 ):
     """Run the complete pipeline with given inputs.
     
@@ -170,7 +206,6 @@ def run_pipeline(
         Final pipeline state with all results, or state at checkpoint if waiting for confirmation
     """
     from pipeline.state import create_initial_state
-    from pipeline.checkpoints import resume_from_checkpoint
     
     # Create initial state
     initial_state = create_initial_state(user_text, model, session_id)
@@ -180,18 +215,19 @@ def run_pipeline(
     thread_id = session_id or initial_state["session_id"]
     config = {"configurable": {"thread_id": thread_id}}
     
-    # Create graph
-    graph = create_pipeline()
+    # Shared compiled graph; already-confirmed runs skip interpret and the pause
+    graph = create_pipeline(interactive=not confirmed)
     
     # Run graph (will interrupt before validate if not confirmed)
     try:
-        final_state = graph.invoke(initial_state, config)
+        # LLM calls and the price download await I/O on the loop
+        final_state = await graph.ainvoke(initial_state, config, durability=CHECKPOINT_DURABILITY)
         
         # Always check current state from checkpoint - invoke() might return final state
         # but we need the actual checkpoint state if execution was interrupted
-        current_state = graph.get_state(config)
+        current_state = await graph.aget_state(config)
         if current_state:
-            logger.info(f"Current checkpoint state - has_next: {current_state.next is not None}, current_step: {current_state.values.get('current_step')}")
+            logger.info("Current checkpoint state - has_next: %s, current_step: %s", current_state.next is not None, current_state.values.get('current_step'))
             if current_state.next:
                 # Execution was interrupted - waiting at checkpoint
                 logger.info("Pipeline paused at checkpoint, waiting for user confirmation")
@@ -208,20 +244,19 @@ def run_pipeline(
         return initial_state
     except Exception as e:
         # If error occurs, try to get state from checkpoint to preserve error info
-        logger.error(f"Pipeline execution error: {e}")
+        logger.error("Pipeline execution error: %s", e)
         try:
-            checkpoint_state = graph.get_state(config)
+            checkpoint_state = await graph.aget_state(config)
             if checkpoint_state and checkpoint_state.values:
-                # Add error to state if not already present
-                if "errors" not in checkpoint_state.values:
-                    checkpoint_state.values["errors"] = []
-                error_msg = str(e)
-                if error_msg not in checkpoint_state.values["errors"]:
-                    checkpoint_state.values["errors"].append(error_msg)
+                # Add error to state if not already present (same rule as the errors reducer);
+                # values is a fresh dict read from the checkpoint, the stored state is untouched
+                checkpoint_state.values["errors"] = append_unique(
+                    checkpoint_state.values.get("errors") or [], [str(e)]
+                )
                 checkpoint_state.values["current_step"] = checkpoint_state.values.get("current_step", "error")
                 return checkpoint_state.values
         except Exception as e2:
-            logger.error(f"Error retrieving checkpoint state: {e2}")
+            logger.error("Error retrieving checkpoint state: %s", e2)
         
         # If we can't get checkpoint state, create error state
         initial_state["errors"] = initial_state.get("errors", [])
@@ -239,21 +274,23 @@ def get_pipeline_state(session_id: str):
     Returns:
         Current state from checkpoint, or None if not found
     """
-    from pipeline.checkpoints import get_checkpoint_state, create_checkpointer
+    from pipeline.checkpoints import get_checkpoint_state
     
-    # Create a graph instance to access the shared checkpointer
-    # The checkpointer is shared, so we can get state from any graph instance
+    # The shared compiled graph holds the shared checkpointer
     graph = create_pipeline()
     try:
         return get_checkpoint_state(graph, session_id)
     except Exception as e:
-        logger.error(f"Error getting pipeline state for session {session_id}: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.error("Error getting pipeline state for session %s: %s", session_id, e, exc_info=True)
         return None
 
 
 def resume_pipeline(session_id: str, confirmed: bool = True):
+    """Synchronous aresume_pipeline, for callers without an event loop (the Streamlit app)."""
+    return _run_sync(aresume_pipeline(session_id, confirmed))
+
+
+async def aresume_pipeline(session_id: str, confirmed: bool = True):
     """Resume pipeline execution from checkpoint after user confirmation.
     
     Args:
@@ -268,87 +305,62 @@ def resume_pipeline(session_id: str, confirmed: bool = True):
     
     # Get current state
     try:
-        current_state = graph.get_state(config)
+        current_state = await graph.aget_state(config)
         if not current_state:
-            logger.error(f"No checkpoint found for session {session_id}")
+            logger.error("No checkpoint found for session %s", session_id)
             raise ValueError(f"No checkpoint found for session {session_id}")
     except Exception as e:
-        logger.error(f"Error getting checkpoint state: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        logger.error("Error getting checkpoint state: %s", e, exc_info=True)
         raise
     
-    logger.info(f"Found checkpoint state for session {session_id}, current step: {current_state.values.get('current_step')}")
+    logger.info("Found checkpoint state for session %s, current step: %s", session_id, current_state.values.get('current_step'))
     
-    # Update confirmed status
     current_state.values["confirmed"] = confirmed
-    try:
-        graph.update_state(config, current_state.values)
-        logger.info("Updated confirmed status in checkpoint")
-    except Exception as e:
-        logger.warning(f"Could not update state: {e}, continuing anyway")
     
     # Resume execution
     if confirmed:
         try:
-            # Invoke with None to continue from checkpoint
-            # This will run the pipeline from the checkpoint to completion
-            logger.info(f"Resuming pipeline execution for session {session_id}")
+            # The Command writes confirmed and resumes from the checkpoint in one
+            # transition, running the pipeline to completion
+            logger.info("Resuming pipeline execution for session %s", session_id)
             
-            # Use stream to handle checkpoint errors gracefully
-            # The pipeline will complete but checkpointing may fail on DataFrames
+            # Node outputs arrive as events while they run; the root run's end
+            # event carries the final state, so the checkpoint store is not re-read
             final_state = None
-            try:
-                # Use stream() instead of invoke() to capture state even if checkpointing fails
-                final_state = None
-                for event in graph.stream(None, config):
-                    if event:
-                        for node_name, node_state in event.items():
-                            if node_state and isinstance(node_state, dict):
-                                final_state = node_state
-                                logger.debug(f"Captured state from node: {node_name}")
-            except Exception as checkpoint_error:
-                # Checkpoint error (likely DataFrame serialization) - but pipeline may have completed
-                if "msgpack" in str(checkpoint_error).lower() or "serializable" in str(checkpoint_error).lower():
-                    logger.warning(f"Checkpoint serialization error (expected for DataFrames): {checkpoint_error}")
-                    # final_state should already be captured from stream before error
-                else:
-                    # Real error - re-raise
-                    raise
+            async for ev in graph.astream_events(
+                Command(update={"confirmed": True}, resume=True),
+                config,
+                version="v2",
+                durability=CHECKPOINT_DURABILITY,
+            ):
+                if ev["event"] != "on_chain_end":
+                    continue
+                if not ev["parent_ids"]:
+                    final_state = ev["data"].get("output")
+                elif ev["name"] == ev["metadata"].get("langgraph_node"):
+                    logger.debug("Node finished: %s", ev['name'])
             
-            logger.info(f"Pipeline stream completed. Final state captured: {final_state is not None}")
+            logger.info("Pipeline stream completed. Final state captured: %s", final_state is not None)
             
-            # Use the final_state from stream (it has DataFrames even if checkpointing failed)
             if final_state and isinstance(final_state, dict):
                 has_backtest = final_state.get("backtest_results") is not None
                 current_step = final_state.get("current_step", "unknown")
-                logger.info(f"Using final_state from stream - current_step: {current_step}, has_backtest_results: {has_backtest}")
+                logger.info("Using final_state from stream - current_step: %s, has_backtest_results: %s", current_step, has_backtest)
                 return final_state
             
-            # Fallback: try to get state from checkpoint (won't have DataFrames)
-            logger.warning("No final_state from stream, trying checkpoint...")
-            updated_state = graph.get_state(config)
-            
-            if updated_state:
-                logger.info(f"Using checkpoint state - has backtest_results: {updated_state.values.get('backtest_results') is not None}")
-                return updated_state.values
-            
-            # Last resort
             logger.error("No state found after pipeline execution")
             return current_state.values
             
         except Exception as e:
-            logger.error(f"Error resuming pipeline: {e}")
-            import traceback
-            logger.error(traceback.format_exc())
+            logger.error("Error resuming pipeline: %s", e, exc_info=True)
             # Return current state if available
             try:
-                updated_state = graph.get_state(config)
+                updated_state = await graph.aget_state(config)
                 if updated_state:
                     logger.info("Returning state after error")
                     return updated_state.values
             except Exception as e2:
-                logger.error(f"Error getting state after resume failure: {e2}")
+                logger.error("Error getting state after resume failure: %s", e2)
             return current_state.values if current_state else None
     else:
         # User wants to reset - return current state without proceeding
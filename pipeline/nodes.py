@@ -1,16 +1,17 @@
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any, Dict
 
 from core.strategy_spec import StrategySpec
 from core.validator import validate_spec, validate_with_data
-from core.data import load_price_data, add_features
-from core.backtester import run_backtest, extract_trades
+from core.data import load_price_data, prefetch_price_data, add_features
+from core.backtester import run_backtest_detailed, extract_trades
 from core.metrics import compute_basic_metrics
-from llm.translator import translate_to_spec
-from llm.interpreter import explain_interpretation
-from llm.explainer import summarize_results
+from llm.translator import atranslate_to_spec, atranslate_with_interpretation
+from llm.interpreter import aexplain_interpretation
+from llm.explainer import asummarize_results
 from pipeline.errors import retry_on_api_error, retry_on_network_error, handle_node_error
 
 if TYPE_CHECKING:
@@ -19,89 +20,99 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 
 
-def initialize_node(state: "PipelineState") -> "PipelineState":
+def initialize_node(state: "PipelineState") -> Dict[str, Any]:
     """Initialize the pipeline state (already done, just update step)."""
-    state["current_step"] = "initialize"
-    logger.info(f"Pipeline initialized for session {state['session_id']}")
-    return state
+    logger.info("Pipeline initialized for session %s", state['session_id'])
+    return {"current_step": "initialize"}
 
 
-def translate_node(state: "PipelineState") -> "PipelineState":
+async def translate_node(state: "PipelineState") -> Dict[str, Any]:
     """Translate natural language strategy to StrategySpec."""
-    state["current_step"] = "translate"
-    
+    # Unconfirmed runs get the interpretation in the same response; interpret_node
+    # only makes its own call if the model left it out. Already-confirmed runs
+    # never show it, so they use the shorter translation-only prompt.
     @retry_on_api_error(max_retries=3)
-    def _translate_with_retry():
-        return translate_to_spec(state["user_text"], model=state["model"])
+    async def _translate_with_retry():
+        if state["confirmed"]:
+            return await atranslate_to_spec(state["user_text"], model=state["model"]), None
+        return await atranslate_with_interpretation(state["user_text"], model=state["model"])
     
     try:
         logger.info("Translating strategy description to spec...")
-        spec = _translate_with_retry()
-        state["spec"] = spec
-        logger.info(f"Translation successful: {spec.ticker} from {spec.start_date} to {spec.end_date}")
+        spec, interpretation = await _translate_with_retry()
+        logger.info("Translation successful: %s from %s to %s", spec.ticker, spec.start_date, spec.end_date)
+        # Download prices while the pipeline waits for the user's confirmation;
+        # fetch_data_node picks them up (or retries) after validation
+        prefetch_price_data(spec)
     except Exception as e:
-        state = handle_node_error("translate_node", state, e, is_critical=True, retry_count_key="translate")
+        handle_node_error("translate_node", state, e, is_critical=True, retry_count_key="translate")
         raise  # Re-raise to allow graph-level error handling
     
-    return state
+    return {"current_step": "translate", "spec": spec, "interpretation": interpretation}
 
 
-def interpret_node(state: "PipelineState") -> "PipelineState":
+async def interpret_node(state: "PipelineState") -> Dict[str, Any]:
     """Generate human-readable interpretation explanation."""
-    state["current_step"] = "interpret"
+    spec = state["spec"]
+    interpretation = state["interpretation"]
+    user_text = state["user_text"]
+    model = state["model"]
+    update: Dict[str, Any] = {"current_step": "interpret"}
     
-    if state["spec"] is None:
+    if spec is None:
         error_msg = "Cannot interpret: spec is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
+    
+    if interpretation is not None:
+        logger.info("Using interpretation from the translation response")
+        return update
     
     @retry_on_api_error(max_retries=2)  # Fewer retries for non-critical operation
-    def _interpret_with_retry():
-        return explain_interpretation(
-            state["user_text"],
-            state["spec"],
-            model=state["model"]
+    async def _interpret_with_retry():
+        return await aexplain_interpretation(
+            user_text,
+            spec,
+            model=model
         )
     
     try:
         logger.info("Generating interpretation explanation...")
-        interpretation = _interpret_with_retry()
-        state["interpretation"] = interpretation
+        update["interpretation"] = await _interpret_with_retry()
         logger.info("Interpretation generated successfully")
     except Exception as e:
         # Non-critical: continue with None interpretation
-        state = handle_node_error("interpret_node", state, e, is_critical=False, retry_count_key="interpret")
-        state["warnings"].append(f"Interpretation generation failed: {str(e)}")
-        state["interpretation"] = None
+        update.update(handle_node_error("interpret_node", state, e, is_critical=False, retry_count_key="interpret"))
+        update["warnings"] = [f"Interpretation generation failed: {str(e)}"]
+        update["interpretation"] = None
     
-    return state
+    return update
 
 
-def validate_node(state: "PipelineState") -> "PipelineState":
+def validate_node(state: "PipelineState") -> Dict[str, Any]:
     """Validate strategy structure and logic."""
-    state["current_step"] = "validate"
+    spec = state["spec"]
+    update: Dict[str, Any] = {"current_step": "validate"}
     
-    if state["spec"] is None:
+    if spec is None:
         error_msg = "Cannot validate: spec is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
     
     try:
         logger.info("Validating strategy specification...")
-        validation_result = validate_spec(state["spec"])
-        state["validation_result"] = validation_result
-        
+        validation_result = validate_spec(spec)
+        update["validation_result"] = validation_result
+    
         # Add errors and warnings to state
-        state["errors"].extend(validation_result.errors)
-        state["warnings"].extend(validation_result.warnings)
-        
+        update["errors"] = list(validation_result.errors)
+        update["warnings"] = list(validation_result.warnings)
+    
         if validation_result.errors:
-            logger.error(f"Validation found {len(validation_result.errors)} errors")
+            logger.error("Validation found %d errors", len(validation_result.errors))
         if validation_result.warnings:
-            logger.warning(f"Validation found {len(validation_result.warnings)} warnings")
-        
+            logger.warning("Validation found %d warnings", len(validation_result.warnings))
+    
         if validation_result.ok:
             logger.info("Validation passed")
         else:
@@ -109,84 +120,83 @@ def validate_node(state: "PipelineState") -> "PipelineState":
     except Exception as e:
         error_msg = f"Validation failed with exception: {str(e)}"
         logger.error(error_msg)
-        state["errors"].append(error_msg)
+        update["errors"] = [error_msg]
     
-    return state
+    return update
 
 
-def fetch_data_node(state: "PipelineState") -> "PipelineState":
+async def fetch_data_node(state: "PipelineState") -> Dict[str, Any]:
     """Download price data from yfinance."""
-    state["current_step"] = "fetch_data"
-    
-    if state["spec"] is None:
+    spec = state["spec"]
+    if spec is None:
         error_msg = "Cannot fetch data: spec is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {"current_step": "fetch_data", "errors": [error_msg]}
     
     @retry_on_network_error(max_retries=3)
-    def _fetch_data_with_retry():
-        return load_price_data(state["spec"])
+    async def _fetch_data_with_retry():
+        # yfinance is blocking; run it off the event loop
+        return await asyncio.to_thread(load_price_data, spec)
     
     try:
-        logger.info(f"Fetching price data for {state['spec'].ticker}...")
-        df = _fetch_data_with_retry()
-        state["data"] = df
-        logger.info(f"Data fetched successfully: {len(df)} rows")
+        logger.info("Fetching price data for %s...", spec.ticker)
+        df = await _fetch_data_with_retry()
+        logger.info("Data fetched successfully: %d rows", len(df))
     except Exception as e:
-        state = handle_node_error("fetch_data_node", state, e, is_critical=True, retry_count_key="fetch_data")
+        handle_node_error("fetch_data_node", state, e, is_critical=True, retry_count_key="fetch_data")
         raise  # Re-raise to allow graph-level error handling
     
-    return state
+    return {"current_step": "fetch_data", "data": df}
 
 
-def add_features_node(state: "PipelineState") -> "PipelineState":
+def add_features_node(state: "PipelineState") -> Dict[str, Any]:
     """Add features (MAs, volatility) to the data."""
-    state["current_step"] = "add_features"
+    data = state["data"]
+    spec = state["spec"]
+    update: Dict[str, Any] = {"current_step": "add_features"}
     
-    if state["data"] is None or state["spec"] is None:
+    if data is None or spec is None:
         error_msg = "Cannot add features: data or spec is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
     
     try:
         logger.info("Adding features to data...")
-        df = add_features(state["data"], state["spec"])
-        state["data"] = df
+        update["data"] = add_features(data, spec)
         logger.info("Features added successfully")
     except Exception as e:
         error_msg = f"Feature addition failed: {str(e)}"
         logger.error(error_msg)
-        state["errors"].append(error_msg)
+        update["errors"] = [error_msg]
     
-    return state
+    return update
 
 
-def pre_qa_node(state: "PipelineState") -> "PipelineState":
+def pre_qa_node(state: "PipelineState") -> Dict[str, Any]:
     """Pre-backtest QA: data-dependent validation."""
-    state["current_step"] = "pre_qa"
+    data = state["data"]
+    spec = state["spec"]
+    update: Dict[str, Any] = {"current_step": "pre_qa"}
     
-    if state["data"] is None or state["spec"] is None:
+    if data is None or spec is None:
         error_msg = "Cannot run pre-backtest QA: data or spec is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
     
     try:
         logger.info("Running pre-backtest QA...")
-        validation_result = validate_with_data(state["spec"], state["data"])
-        state["data_validation_result"] = validation_result
-        
+        validation_result = validate_with_data(spec, data)
+        update["data_validation_result"] = validation_result
+    
         # Add errors and warnings to state
-        state["errors"].extend(validation_result.errors)
-        state["warnings"].extend(validation_result.warnings)
-        
+        update["errors"] = list(validation_result.errors)
+        update["warnings"] = list(validation_result.warnings)
+    
         if validation_result.errors:
-            logger.error(f"Pre-backtest QA found {len(validation_result.errors)} errors")
+            logger.error("Pre-backtest QA found %d errors", len(validation_result.errors))
         if validation_result.warnings:
-            logger.warning(f"Pre-backtest QA found {len(validation_result.warnings)} warnings")
-        
+            logger.warning("Pre-backtest QA found %d warnings", len(validation_result.warnings))
+    
         if validation_result.ok:
             logger.info("Pre-backtest QA passed")
         else:
@@ -194,140 +204,153 @@ def pre_qa_node(state: "PipelineState") -> "PipelineState":
     except Exception as e:
         error_msg = f"Pre-backtest QA failed with exception: {str(e)}"
         logger.error(error_msg)
-        state["errors"].append(error_msg)
+        update["errors"] = [error_msg]
     
-    return state
+    return update
 
 
-def backtest_node(state: "PipelineState") -> "PipelineState":
+def backtest_node(state: "PipelineState") -> Dict[str, Any]:
     """Execute the backtest."""
-    state["current_step"] = "backtest"
+    data = state["data"]
+    spec = state["spec"]
+    update: Dict[str, Any] = {"current_step": "backtest"}
     
-    if state["data"] is None or state["spec"] is None:
+    if data is None or spec is None:
         error_msg = "Cannot run backtest: data or spec is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
     
     try:
         logger.info("Running backtest...")
-        results_df = run_backtest(state["data"], state["spec"])
-        state["backtest_results"] = results_df
+        result = run_backtest_detailed(data, spec)
+        update["backtest_results"] = result.df
         logger.info("Backtest completed successfully")
     except Exception as e:
         error_msg = f"Backtest failed: {str(e)}"
         logger.error(error_msg)
-        state["errors"].append(error_msg)
+        return {**update, "errors": [error_msg]}
+    
+    # Build the trade log from the same masks/positions instead of re-running the rules;
+    # on failure trades_node retries from scratch and reports it as a warning
+    try:
+        update["trades"] = extract_trades(result.df, spec, result)
+    except Exception as e:
+        logger.warning("Trade extraction from backtest result failed: %s", e)
     
-    return state
+    return update
 
 
-def metrics_node(state: "PipelineState") -> "PipelineState":
+def metrics_node(state: "PipelineState") -> Dict[str, Any]:
     """Compute performance metrics."""
-    state["current_step"] = "metrics"
+    backtest_results = state["backtest_results"]
+    update: Dict[str, Any] = {"current_step": "metrics"}
     
-    if state["backtest_results"] is None:
+    if backtest_results is None:
         error_msg = "Cannot compute metrics: backtest_results is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
     
     try:
         logger.info("Computing performance metrics...")
-        metrics = compute_basic_metrics(state["backtest_results"])
-        state["metrics"] = metrics
-        logger.info(f"Metrics computed: {metrics}")
+        metrics = compute_basic_metrics(backtest_results)
+        update["metrics"] = metrics
+        logger.info("Metrics computed: %s", metrics)
     except Exception as e:
         error_msg = f"Metrics computation failed: {str(e)}"
         logger.error(error_msg)
-        state["errors"].append(error_msg)
+        update["errors"] = [error_msg]
     
-    return state
+    return update
 
 
-def trades_node(state: "PipelineState") -> "PipelineState":
+def trades_node(state: "PipelineState") -> Dict[str, Any]:
     """Extract detailed trade-by-trade information."""
-    state["current_step"] = "trades"
+    data = state["data"]
+    spec = state["spec"]
+    trades = state["trades"]
+    update: Dict[str, Any] = {"current_step": "trades"}
     
-    if state["data"] is None or state["spec"] is None:
+    if data is None or spec is None:
         error_msg = "Cannot extract trades: data or spec is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
+    
+    if trades is not None:
+        logger.info("Using %d trades from the backtest run", len(trades))
+        return update
     
     try:
         logger.info("Extracting trade details...")
-        trades = extract_trades(state["data"], state["spec"])
-        state["trades"] = trades
-        logger.info(f"Extracted {len(trades)} trades")
+        trades = extract_trades(data, spec)
+        update["trades"] = trades
+        logger.info("Extracted %d trades", len(trades))
     except Exception as e:
         error_msg = f"Trade extraction failed: {str(e)}"
         logger.error(error_msg)
-        state["warnings"].append(error_msg)  # Non-critical
-        state["trades"] = []
+        update["warnings"] = [error_msg]  # Non-critical
+        update["trades"] = []
     
-    return state
+    return update
 
 
-def explain_node(state: "PipelineState") -> "PipelineState":
+async def explain_node(state: "PipelineState") -> Dict[str, Any]:
     """Generate LLM explanation of results."""
-    state["current_step"] = "explain"
+    spec = state["spec"]
+    metrics = state["metrics"]
+    model = state["model"]
+    update: Dict[str, Any] = {"current_step": "explain"}
     
-    if state["spec"] is None or state["metrics"] is None:
+    if spec is None or metrics is None:
         error_msg = "Cannot generate explanation: spec or metrics is None"
-        state["errors"].append(error_msg)
         logger.error(error_msg)
-        return state
+        return {**update, "errors": [error_msg]}
     
     @retry_on_api_error(max_retries=2)  # Fewer retries for non-critical operation
-    def _explain_with_retry():
-        return summarize_results(
-            state["spec"],
-            state["metrics"],
-            model=state["model"]
+    async def _explain_with_retry():
+        return await asummarize_results(
+            spec,
+            metrics,
+            model=model
         )
     
     try:
         logger.info("Generating explanation...")
-        explanation = _explain_with_retry()
-        state["explanation"] = explanation
+        update["explanation"] = await _explain_with_retry()
         logger.info("Explanation generated successfully")
     except Exception as e:
         # Non-critical: continue without explanation
-        state = handle_node_error("explain_node", state, e, is_critical=False, retry_count_key="explain")
-        state["warnings"].append(f"Explanation generation failed: {str(e)}")
-        state["explanation"] = f"(Explanation unavailable: {str(e)})"
+        update.update(handle_node_error("explain_node", state, e, is_critical=False, retry_count_key="explain"))
+        update["warnings"] = [f"Explanation generation failed: {str(e)}"]
+        update["explanation"] = f"(Explanation unavailable: {str(e)})"
     
-    return state
+    return update
 
 
-def aggregate_node(state: "PipelineState") -> "PipelineState":
+def aggregate_node(state: "PipelineState") -> Dict[str, Any]:
     """Aggregate all results into final output format."""
-    state["current_step"] = "aggregate"
-    
+    errors = state["errors"]
+    warnings = state["warnings"]
     logger.info("Aggregating results...")
     # State already contains all aggregated data
     # This node is mainly for logging and final checks
     
-    if state["errors"]:
-        logger.warning(f"Pipeline completed with {len(state['errors'])} errors")
-    if state["warnings"]:
-        logger.info(f"Pipeline completed with {len(state['warnings'])} warnings")
+    if errors:
+        logger.warning("Pipeline completed with %d errors", len(errors))
+    if warnings:
+        logger.info("Pipeline completed with %d warnings", len(warnings))
     
     logger.info("Results aggregation complete")
-    return state
+    return {"current_step": "aggregate"}
 
 
-def persist_node(state: "PipelineState") -> "PipelineState":
+def persist_node(state: "PipelineState") -> Dict[str, Any]:
     """Persist state and metrics to disk."""
-    state["current_step"] = "persist"
-    
     logger.info("Persisting results...")
     # Metrics are already logged by individual LLM modules via log_metrics()
     # This node is for any additional persistence if needed
     
     logger.info("Persistence complete")
-    return state
+    return {"current_step": "persist"}
 
 
 # Quick validation when run directly: python pipeline/nodes.py
@@ -1,13 +1,57 @@
 from __future__ import annotations
 
+import uuid
 from datetime import datetime
-from typing import TypedDict, Optional, List, Dict, Any
-
-import pandas as pd
+from typing import TYPE_CHECKING, Annotated, TypedDict, Optional, List, Dict, Any
 
 from core.strategy_spec import StrategySpec
-from core.validator import ValidationResult
-from core.backtester import Trade
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+    from core.validator import ValidationResult
+    from core.backtester import Trade
+else:
+    # LangGraph resolves these annotations with get_type_hints when it builds the
+    # graph, so they need runtime names; Any avoids importing pandas for them
+    DataFrame = ValidationResult = Trade = Any
+
+
+class ResetList(list):
+    """List written to an accumulating channel to replace its value, not extend it.
+    
+    create_initial_state sends these, so a new run on a thread that already
+    has a checkpoint (the app reruns on the same session id) starts with empty
+    errors/warnings instead of inheriting the previous run's.
+    """
+
+
+class ResetDict(dict):
+    """Dict counterpart of ResetList, for the retry_count channel."""
+
+
+def _latest(current: str, update: str) -> str:
+    """Reducer keeping the most recent write (parallel branches may both write)."""
+    return update
+
+
+def append_unique(current: List[str], update: List[str]) -> List[str]:
+    """Reducer appending messages not already recorded, checked against a set.
+    
+    Used for errors and warnings; also applied by hand when an error is added
+    to a state read back from a checkpoint.
+    """
+    if isinstance(update, ResetList):
+        current = []
+    seen = set(current)
+    new = [m for m in update if m not in seen and not seen.add(m)]
+    return current + new if new else current
+
+
+def _merge_counts(current: Dict[str, int], update: Dict[str, int]) -> Dict[str, int]:
+    """Reducer merging per-node retry counters."""
+    if isinstance(update, ResetDict):
+        return dict(update)
+    return {**current, **update}
 
 
 class PipelineState(TypedDict):
@@ -15,6 +59,12 @@ class PipelineState(TypedDict):
     
     This TypedDict defines all state variables that flow through the pipeline,
     from initial user input to final results.
+    
+    Nodes return only the keys they change. Keys that parallel branches can
+    both write carry a reducer: errors/warnings are appended (each distinct
+    message once), current_step keeps the latest value and retry counts are
+    merged. The initial state writes ResetList/ResetDict values, which those
+    reducers take as a replacement, so they accumulate only within a run.
     """
     
     # Input parameters
@@ -33,24 +83,24 @@ class PipelineState(TypedDict):
     data_validation_result: Optional[ValidationResult]  # Data-dependent validation result
     
     # Data processing
-    data: Optional[pd.DataFrame]  # Price data with features (OHLCV, MAs, volatility)
+    data: Optional[DataFrame]  # Price data with features (OHLCV, MAs, volatility)
     
     # Backtest results
-    backtest_results: Optional[pd.DataFrame]  # Backtest output with positions, returns, equity curve
+    backtest_results: Optional[DataFrame]  # Backtest output with positions, returns, equity curve
     metrics: Optional[Dict[str, float]]  # Performance metrics (CAGR, drawdown, Sharpe, etc.)
     trades: Optional[List[Trade]]  # Detailed trade-by-trade information
     explanation: Optional[str]  # LLM-generated explanation of results
     
     # Error tracking
-    errors: List[str]  # List of error messages encountered
-    warnings: List[str]  # List of warning messages
+    errors: Annotated[List[str], append_unique]  # List of error messages encountered
+    warnings: Annotated[List[str], append_unique]  # List of warning messages
     
     # Metrics tracking
     metrics_log: List[Dict[str, Any]]  # Log of all LLM calls (tokens, costs, latency)
     
     # Pipeline control
-    current_step: str  # Current pipeline step name
-    retry_count: Dict[str, int]  # Track retry attempts per node
+    current_step: Annotated[str, _latest]  # Current pipeline step name
+    retry_count: Annotated[Dict[str, int], _merge_counts]  # Track retry attempts per node
 
 
 def create_initial_state(
@@ -68,10 +118,8 @@ def create_initial_state(
     Returns:
         Initialized PipelineState with all required fields set
     """
-    import uuid
-    
     if session_id is None:
-        session_id = str(uuid.uuid4())
+        session_id = uuid.uuid4().hex
     
     return PipelineState(
         # Input
@@ -99,15 +147,15 @@ def create_initial_state(
         explanation=None,
         
         # Error tracking
-        errors=[],
-        warnings=[],
+        errors=ResetList(),
+        warnings=ResetList(),
         
         # Metrics
         metrics_log=[],
         
         # Control
         current_step="initialize",
-        retry_count={},
+        retry_count=ResetDict(),
     )
 
 
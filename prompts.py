@@ -1,4 +1,5 @@
-PROMPTS = [
+# Read-only: a tuple, so concurrent evaluation code can't mutate it
+PROMPTS = (
 
   
     "Backtest AAPL from 2018-01-01 to 2024-01-01 using a long-only strategy that buys when the 10-day moving average crosses above the 50-day moving average and sells on the opposite crossover.",
@@ -79,7 +80,7 @@ PROMPTS = [
 
     "Backtest AAPL from 2018-01-01 to 2024-01-01 buying during calm volatility periods (20-day RV < 1-year median) when the 30-day MA crosses above 200-day MA and selling on the opposite cross.",
 
-    "Backtest AAPL from 2018-01-01 to 2024-01-01 buying with a 50/100-day MA crossover rule only when volatility is quiet based on 20-day RV. Exit on cross down."
+    "Backtest AAPL from 2018-01-01 to 2024-01-01 buying with a 50/100-day MA crossover rule only when volatility is quiet based on 20-day RV. Exit on cross down.",
 
     "Backtest SPY from 2020-01-01 to 2023-12-31. Go long when the 20-day moving average crosses above the 50-day moving average. Exit when the 20-day moving average crosses below the 50-day moving average. Show CAGR, max drawdown, and Sharpe ratio.",
 
@@ -196,5 +197,4 @@ PROMPTS = [
     "Backtest DKNG from 2020-01-01 to 2024-01-01. Go long when 7-day MA crosses above 18-day MA. Exit when 7-day MA crosses below or RV rises above its median. Show performance.",
 
     "Backtest SOFI from 2021-01-01 to 2024-01-01. Enter long when 6-day MA crosses above 16-day MA. Exit when the 6-day MA crosses below OR 12-day RV exceeds median. Show metrics.",
-]
-
+)
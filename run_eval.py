@@ -1,7 +1,14 @@
+import asyncio
 import json
 import os
-from openai import OpenAI
-from llm.translator import translate_to_spec
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib json module
+    orjson = None
+
+from llm._client import async_client
+from llm.translator import atranslate_to_spec
 from core.strategy_spec import StrategySpec
 
 # -----------------------------
@@ -12,6 +19,9 @@ MODELS = [
     "gpt-4o"
 ]
 
+# Max LLM requests in flight at once (keeps the eval under rate limits)
+CONCURRENCY = 20
+
 # Load prompts
 from prompts import PROMPTS
 
@@ -62,23 +72,31 @@ RULES:
 """
 
 
+# Built once so every request sends a byte-identical prefix for prompt caching
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
 GROUND_TRUTH_MODEL = "gpt-4o-mini"   
 
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+
 def normalize(obj):
-    """Normalize dict/list structure so ordering never affects comparison."""
+    """Canonical hashable form of a JSON value, so ordering never affects comparison.
+
+    Dicts become sorted tuples of (key, value) pairs and lists become sorted
+    tuples, so nested values compare directly without re-serializing them.
+    """
     if isinstance(obj, dict):
-        return {k: normalize(v) for k, v in sorted(obj.items())}
+        return tuple(sorted((k, normalize(v)) for k, v in obj.items()))
 
     if isinstance(obj, list):
-
-        if all(isinstance(x, dict) for x in obj):
-            # Sort list of dicts by stable JSON representation
-            return sorted([normalize(x) for x in obj],
-                          key=lambda d: json.dumps(d, sort_keys=True))
-
-        if all(not isinstance(x, dict) for x in obj):
-            # Sort scalars directly
-            return sorted(obj)
+        items = [normalize(x) for x in obj]
+        try:
+            return tuple(sorted(items))
+        except TypeError:
+            # Mixed element types don't order against each other
+            return tuple(sorted(items, key=repr))
 
     return obj
 
@@ -86,8 +104,17 @@ def normalize(obj):
 # -----------------------------
 # COMPARISON FUNCTION
 # -----------------------------
-def compare_json(gt, pred):
-    """Order-insensitive comparison of ground-truth vs GPT output."""
+def canonical(spec_json):
+    """Top-level fields of a spec dict, each in normalized form."""
+    return dict(normalize(spec_json))
+
+
+def compare_json(gt_norm, pred):
+    """Order-insensitive comparison of ground-truth vs GPT output.
+
+    gt_norm is the ground truth already passed through canonical(), so it is
+    normalized once per prompt rather than once per model.
+    """
 
     if pred is None:
         return {
@@ -100,13 +127,11 @@ def compare_json(gt, pred):
             "full_match": False
         }
 
-    # Accept both ticker/symbol names
-    gt_symbol = gt.get("ticker") or gt.get("symbol")
-    pred_symbol = pred.get("ticker") or pred.get("symbol")
+    pred_norm = canonical(pred)
 
-    # Normalize structures
-    gt_norm = normalize(gt)
-    pred_norm = normalize(pred)
+    # Accept both ticker/symbol names
+    gt_symbol = gt_norm.get("ticker") or gt_norm.get("symbol")
+    pred_symbol = pred_norm.get("ticker") or pred_norm.get("symbol")
 
     score = {
         "valid_json": True,
@@ -115,12 +140,9 @@ def compare_json(gt, pred):
             gt_norm.get("start_date") == pred_norm.get("start_date")
             and gt_norm.get("end_date") == pred_norm.get("end_date")
         ),
-        "correct_entry_rules":
-            normalize(gt_norm.get("entry_rules")) == normalize(pred_norm.get("entry_rules")),
-        "correct_exit_rules":
-            normalize(gt_norm.get("exit_rules")) == normalize(pred_norm.get("exit_rules")),
-        "correct_metrics":
-            normalize(gt_norm.get("metrics")) == normalize(pred_norm.get("metrics")),
+        "correct_entry_rules": gt_norm.get("entry_rules") == pred_norm.get("entry_rules"),
+        "correct_exit_rules": gt_norm.get("exit_rules") == pred_norm.get("exit_rules"),
+        "correct_metrics": gt_norm.get("metrics") == pred_norm.get("metrics"),
     }
 
     score["full_match"] = all(score.values())
@@ -130,66 +152,102 @@ def compare_json(gt, pred):
 # -----------------------------
 # GPT CALL
 # -----------------------------
-def run_gpt(model, prompt):
-    client = OpenAI()
-
+async def run_gpt(client, model, prompt):
     try:
-        response = client.chat.completions.create(
+        response = await client.chat.completions.create(
             model=model,
             messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
+                _SYSTEM_MESSAGE,
                 {"role": "user", "content": prompt}
             ],
-            temperature=0
+            temperature=0,
+            response_format={"type": "json_object"},
         )
     except Exception:
         return None
 
     content = response.choices[0].message.content
 
+    # JSON mode guarantees well-formed output unless the reply was cut off,
+    # which still scores as invalid JSON
     try:
-        return json.loads(content)
-    except:
+        return _json_loads(content)
+    except ValueError:
         return None
 
 
 # -----------------------------
 # MAIN EVALUATION LOOP
 # -----------------------------
-if __name__ == "__main__":
+async def evaluate(prompts):
+    """Translate ground truth and query every model for all prompts concurrently."""
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def limited(coro):
+        async with semaphore:
+            return await coro
+
+    # Ground truth (YOUR translator). Translations are cached on disk by model,
+    # system instructions and prompt (see llm/_cache.py), so reruns make no
+    # ground-truth calls until the translator's instructions change.
+    print(f"Translating {len(prompts)} ground-truth specs...")
+    gt_specs: list[StrategySpec] = await asyncio.gather(
+        *(limited(atranslate_to_spec(prompt, model=GROUND_TRUTH_MODEL)) for prompt in prompts)
+    )
+
+    # Paraphrases that translate to the same spec are grouped; candidate models
+    # run once on the first prompt of each group and every member gets its result
+    groups = {}
+    for prompt, gt_spec in zip(prompts, gt_specs):
+        groups.setdefault(gt_spec.canonical_json, []).append((prompt, gt_spec))
+    representatives = [members[0][0] for members in groups.values()]
+    print(f"{len(representatives)} distinct specs across {len(prompts)} prompts")
+
+    print(f"Evaluating {', '.join(MODELS)}...")
+    preds = await asyncio.gather(
+        *(limited(run_gpt(async_client, model, prompt)) for prompt in representatives for model in MODELS)
+    )
 
     results = []
+    for i, members in enumerate(groups.values()):
+        representative, gt_spec = members[0]
+        gt_json = gt_spec.to_dict()
+        gt_norm = canonical(gt_json)
 
-    print("\n=== Running NL → DSL Evaluation ===\n")
+        models = {}
+        for j, model in enumerate(MODELS):
+            pred_json = preds[i * len(MODELS) + j]
+            score = compare_json(gt_norm, pred_json)
 
-    for i, prompt in enumerate(PROMPTS, start=1):
-        print(f"\n--- Prompt {i}/{len(PROMPTS)} ---")
+            models[model] = {
+                "output": pred_json,
+                "score": score
+            }
 
-        # Ground truth (YOUR translator)
-        gt_spec: StrategySpec = translate_to_spec(prompt, model=GROUND_TRUTH_MODEL)
+        for prompt, _ in members:
+            row = {
+                "prompt": prompt,
+                "ground_truth": gt_json,
+                "models": models
+            }
+            if prompt != representative:
+                row["evaluated_as"] = representative
+            results.append(row)
 
-        gt_json = gt_spec.to_dict()
-        
-        row = {
-            "prompt": prompt,
-            "ground_truth": gt_json,
-            "models": {}
-        }
+    return results
 
-        for model in MODELS:
-            print(f"  Evaluating {model}...")
 
-            pred_json = run_gpt(model, prompt)
-            score = compare_json(gt_json, pred_json)
+if __name__ == "__main__":
 
-            row["models"][model] = {
-                "output": pred_json,
-                "score": score
-            }
+    print("\n=== Running NL → DSL Evaluation ===\n")
 
-        results.append(row)
+    results = asyncio.run(evaluate(PROMPTS))
 
-    with open("eval_results.json", "w") as f:
-        json.dump(results, f, indent=2)
+    if orjson is not None:
+        with open("eval_results.json", "wb") as f:
+            f.write(orjson.dumps(results, option=orjson.OPT_INDENT_2))
+    else:
+        with open("eval_results.json", "w") as f:
+            json.dump(results, f, indent=2)
 
     print("\nSaved evaluation to eval_results.json")
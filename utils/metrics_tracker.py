@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-import csv
+import atexit
+import logging
 import os
+import threading
+import time
+from collections import deque
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TextIO, Tuple
 
 # Pricing per 1M tokens (as of 2024, update as needed)
 MODEL_PRICING = {
@@ -15,17 +19,49 @@ MODEL_PRICING = {
     "gpt-3.5-turbo": {"input": 0.50, "output": 1.50},
 }
 
+# (input, output) USD per token, precomputed from MODEL_PRICING
+_RATES = {model: (p["input"] / 1_000_000, p["output"] / 1_000_000) for model, p in MODEL_PRICING.items()}
+
+logger = logging.getLogger(__name__)
+
 LOG_FILE = Path(__file__).parent.parent / "metrics_log.csv"
 
+LOG_COLUMNS = [
+    "timestamp",
+    "task_type",
+    "model",
+    "input_tokens",
+    "output_tokens",
+    "total_tokens",
+    "cost_usd",
+    "latency_seconds",
+    "success",
+    "error_message",
+]
+
+# Records queued by log_metrics and written by a background thread every interval.
+# The queue is unbounded; if the writer falls this far behind, the logging call
+# flushes the backlog itself rather than letting it grow
+FLUSH_INTERVAL_SECONDS = 1.0
+FLUSH_HIGH_WATER = 4096
+_buffer: "deque[Tuple]" = deque()
+_flush_lock = threading.Lock()
+_thread_start_lock = threading.Lock()
+_flush_thread: Optional[threading.Thread] = None
+
+# Log file handle, opened on the first flush and kept open for the process
+_log_file: Optional[TextIO] = None
+
+# Records that could not be written because the log file was not writable
+dropped_records = 0
+
 
 def calculate_cost(model: str, input_tokens: int, output_tokens: int) -> float:
     """Calculate cost in USD for token usage."""
-    if model not in MODEL_PRICING:
+    rates = _RATES.get(model)
+    if rates is None:
         return 0.0
-    pricing = MODEL_PRICING[model]
-    input_cost = (input_tokens / 1_000_000) * pricing["input"]
-    output_cost = (output_tokens / 1_000_000) * pricing["output"]
-    return input_cost + output_cost
+    return rates[0] * input_tokens + rates[1] * output_tokens
 
 
 def log_metrics(
@@ -37,42 +73,103 @@ def log_metrics(
     success: bool,
     error_message: Optional[str] = None,
 ) -> None:
-    """Log metrics to CSV file."""
-    total_tokens = input_tokens + output_tokens
+    """Record metrics for one LLM call.
+
+    Only queues the record; a background thread appends queued records to the
+    CSV file in batches, so no file I/O happens on the request path unless the
+    queue has reached FLUSH_HIGH_WATER.
+    """
+    _buffer.append(
+        (datetime.now(), task_type, model, input_tokens, output_tokens, latency_seconds, success, error_message)
+    )
+    if _flush_thread is None:
+        _start_flush_thread()
+    if len(_buffer) >= FLUSH_HIGH_WATER:
+        flush_metrics()
+
+
+def _format_row(record: Tuple) -> str:
+    """One CSV line for a record.
+
+    Only the error message can contain commas, quotes or newlines, so it is the
+    only field quoted (CSV-style, quotes doubled); task_type and model must not
+    contain commas.
+    """
+    timestamp, task_type, model, input_tokens, output_tokens, latency_seconds, success, error_message = record
     cost = calculate_cost(model, input_tokens, output_tokens)
-    timestamp = datetime.now().isoformat()
-
-    # Create log file if it doesn't exist
-    file_exists = LOG_FILE.exists()
-    
-    with open(LOG_FILE, "a", newline="") as f:
-        writer = csv.writer(f)
-        
+    error = '"' + error_message.replace('"', '""') + '"' if error_message else ""
+    return (
+        f"{timestamp.isoformat()},{task_type},{model},{input_tokens},{output_tokens},"
+        f"{input_tokens + output_tokens},{cost:.6f},{latency_seconds:.3f},{success},{error}\n"
+    )
+
+
+def flush_metrics() -> None:
+    """Write all queued metrics records to the CSV file.
+
+    If the file can't be written the batch is dropped (LLM calls are never
+    failed over metrics), but the loss is counted in dropped_records and
+    logged.
+    """
+    global _log_file, dropped_records
+    with _flush_lock:
+        records = []
+        while _buffer:
+            records.append(_buffer.popleft())
+        if not records:
+            return
+
+        try:
+            f = _open_log_file()
+            f.write("".join(map(_format_row, records)))
+            f.flush()
+        except OSError as e:
+            dropped_records += len(records)
+            logger.warning(
+                "Could not write %d metrics records to %s (%s); %d dropped so far",
+                len(records), LOG_FILE, e, dropped_records,
+            )
+            if _log_file is not None:
+                try:
+                    _log_file.close()
+                except OSError:
+                    pass
+                _log_file = None  # reopen on the next flush
+
+
+def _open_log_file() -> TextIO:
+    """Return the shared append handle, creating the file (with header) if needed."""
+    global _log_file
+    if _log_file is None:
+        _log_file = open(LOG_FILE, "a", newline="", buffering=8192)
         # Write header if new file
-        if not file_exists:
-            writer.writerow([
-                "timestamp",
-                "task_type",
-                "model",
-                "input_tokens",
-                "output_tokens",
-                "total_tokens",
-                "cost_usd",
-                "latency_seconds",
-                "success",
-                "error_message",
-            ])
-        
-        writer.writerow([
-            timestamp,
-            task_type,
-            model,
-            input_tokens,
-            output_tokens,
-            total_tokens,
-            f"{cost:.6f}",
-            f"{latency_seconds:.3f}",
-            success,
-            error_message or "",
-        ])
+        if _log_file.tell() == 0:
+            _log_file.write(",".join(LOG_COLUMNS) + "\n")
+    return _log_file
+
+
+def _close_log_file() -> None:
+    global _log_file
+    flush_metrics()
+    with _flush_lock:
+        if _log_file is not None:
+            _log_file.close()
+            _log_file = None
+
+
+def _flush_loop() -> None:
+    while True:
+        time.sleep(FLUSH_INTERVAL_SECONDS)
+        flush_metrics()
+
+
+def _start_flush_thread() -> None:
+    global _flush_thread
+    with _thread_start_lock:
+        if _flush_thread is None:
+            _flush_thread = threading.Thread(target=_flush_loop, name="metrics-flush", daemon=True)
+            _flush_thread.start()
+
 
+# Drain whatever is still queued when the process exits
+atexit.register(_close_log_file)